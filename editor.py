@@ -3,7 +3,7 @@ import pygame
 
 from scripts.utils import load_image, load_images, Animation, clip, load_spritesheet
 from scripts.tilemap import Tilemap
-from snowglobe_thief import game_assets
+from scripts.assets import load_assets
 
 LOAD_FILE = "data/maps/0.json"
 TILE_SIZE = 8
@@ -25,6 +25,7 @@ class Editor:
 
         self.clock = pygame.time.Clock()
         
+        game_assets = load_assets()
         self.assets = {}
         for key in game_assets.keys():
             if "tile" in game_assets[key][1]:
@@ -75,23 +76,17 @@ class Editor:
                 self.canvas.blit(current_tile_img, mpos)
 
             if self.clicking and self.ongrid and not self.background:
-                self.tilemap.tilemap[str(tile_pos[0]) + ";" + str(tile_pos[1])] = {"group": self.tile_list[self.tile_group], "part": self.tile_part, "pos": tile_pos}
+                self.tilemap.set_tile(tile_pos, self.tile_list[self.tile_group], self.tile_part)
             if self.clicking and self.ongrid and self.background:
-                self.tilemap.background_tiles[str(tile_pos[0]) + ";" + str(tile_pos[1])] = {"group": self.tile_list[self.tile_group], "part": self.tile_part, "pos": tile_pos}
+                self.tilemap.set_tile(tile_pos, self.tile_list[self.tile_group], self.tile_part, background=True)
             
             if self.right_clicking:
-                tile_loc = str(tile_pos[0]) + ";" + str(tile_pos[1])
-                if not self.background:
-                    if tile_loc in self.tilemap.tilemap:
-                        del self.tilemap.tilemap[tile_loc]
-                else:
-                    if tile_loc in self.tilemap.background_tiles:
-                        del self.tilemap.background_tiles[tile_loc]
+                self.tilemap.remove_tile(tile_pos, background=self.background)
                 for tile in self.tilemap.offgrid_tiles.copy():
                     tile_img = self.assets[tile["group"]][0][tile["part"]]
                     tile_r = pygame.Rect(tile["pos"][0] - self.scroll[0], tile["pos"][1] - self.scroll[1], tile_img.get_width(), tile_img.get_height())
                     if tile_r.collidepoint(mpos):
-                        self.tilemap.offgrid_tiles.remove(tile)
+                        self.tilemap.remove_offgrid(tile)
 
             #self.canvas.blit(current_tile_img, (5, 5))
 
@@ -109,7 +104,7 @@ class Editor:
                         if "entity" in self.assets[self.tile_list[self.tile_group]][1]:
                             self.tilemap.entities.append({"group": self.tile_list[self.tile_group], "part": self.tile_part, "pos": (mpos[0] + self.scroll[0], mpos[1] + self.scroll[1])})
                         if not self.ongrid:
-                            self.tilemap.offgrid_tiles.append({"group": self.tile_list[self.tile_group], "part": self.tile_part, "pos": (mpos[0] + self.scroll[0], mpos[1] + self.scroll[1])})
+                            self.tilemap.add_offgrid((mpos[0] + self.scroll[0], mpos[1] + self.scroll[1]), self.tile_list[self.tile_group], self.tile_part)
                     
                     if event.button == 3:
                         self.right_clicking = True
@@ -0,0 +1,153 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import pygame
+
+from scripts.tilemap import Tilemap
+from scripts.headless import HeadlessGame
+
+MAP_DIR = "data/maps"
+
+context = None
+
+def init_worker():
+    global context
+    context = HeadlessGame()
+
+def convert(tilemap):
+    # bring a map up to the current format: "x;y" keys that match the tile's
+    # integer grid pos, list positions everywhere, all top level keys present
+    changes = 0
+    for layer in [tilemap.tilemap, tilemap.background_tiles]:
+        for loc, tile in list(layer.items()):
+            pos = [int(tile["pos"][0]), int(tile["pos"][1])]
+            new_loc = str(pos[0]) + ";" + str(pos[1])
+            if new_loc != loc or [type(v) for v in tile["pos"]] != [int, int]:
+                del layer[loc]
+                tile["pos"] = pos
+                layer[new_loc] = tile
+                changes += 1
+    for tile in tilemap.offgrid_tiles + tilemap.entities:
+        if not isinstance(tile["pos"], list):
+            tile["pos"] = list(tile["pos"])
+            changes += 1
+    return changes
+
+def tile_rect(tilemap, tile, ongrid, assets):
+    size = assets[tile["group"]][0][tile["part"]].get_size()
+    if ongrid:
+        return pygame.Rect(tile["pos"][0] * tilemap.tile_size, tile["pos"][1] * tilemap.tile_size, size[0], size[1])
+    return pygame.Rect(tile["pos"][0], tile["pos"][1], size[0], size[1])
+
+def validate(tilemap, assets):
+    problems = []
+    entities = {}
+    player_spawners = 0
+
+    layers = [("tilemap", list(tilemap.tilemap.values()), True), ("background", list(tilemap.background_tiles.values()), True),
+              ("offgrid", tilemap.offgrid_tiles, False), ("entities", tilemap.entities, False)]
+    for layer_name, tiles, ongrid in layers:
+        for tile in tiles:
+            where = layer_name + " " + str(tile["pos"])
+            if tile["group"] not in assets or "tile" not in assets[tile["group"]][1]:
+                problems.append(where + ": unknown group " + repr(tile["group"]))
+                continue
+            if not isinstance(tile["part"], int) or not 0 <= tile["part"] < len(assets[tile["group"]][0]):
+                problems.append(where + ": part " + repr(tile["part"]) + " out of range for " + tile["group"])
+                continue
+            if "entity" in assets[tile["group"]][1]:
+                # the editor records offgrid entities in both "offgrid" and "entities", count those once
+                key = (tile["group"], tile["part"], tuple(tile["pos"]), ongrid)
+                if key in entities:
+                    continue
+                if (tile["group"], tile["part"]) == ("spawners", 0):
+                    player_spawners += 1
+                entities[key] = (where, tile_rect(tilemap, tile, ongrid, assets))
+
+    if player_spawners == 0:
+        problems.append("missing player spawner")
+    elif player_spawners > 1:
+        problems.append(str(player_spawners) + " player spawners")
+
+    entities = list(entities.values())
+    for i in range(len(entities)):
+        for j in range(i + 1, len(entities)):
+            if entities[i][1].colliderect(entities[j][1]):
+                problems.append(entities[i][0] + ": overlaps " + entities[j][0])
+
+    return problems
+
+def process_map(path, out_dir=None, autotile=True, write=True, indent=None):
+    start = time.perf_counter()
+
+    tilemap = Tilemap(context, tile_size=8)
+    try:
+        tilemap.load(path)
+    except Exception as e:
+        return {"path": path, "time": time.perf_counter() - start, "changes": 0, "problems": ["unreadable map: " + repr(e)], "saved": None}
+    try:
+        changes = convert(tilemap)
+        tilemap.index_tiles()
+        problems = validate(tilemap, context.assets)
+    except Exception as e: # malformed tiles, e.g. one without a "pos"
+        return {"path": path, "time": time.perf_counter() - start, "changes": 0, "problems": ["malformed map: " + repr(e)], "saved": None}
+    if autotile and not problems:
+        tilemap.autotile(tilemap.tilemap)
+        tilemap.autotile(tilemap.background_tiles)
+
+    saved = None
+    if write and not problems:
+        saved = os.path.join(out_dir, os.path.basename(path)) if out_dir else path
+        tilemap.save(saved)
+        if indent is not None:
+            # Tilemap.save writes compact json, re-dump it for diff friendly output
+            with open(saved) as f:
+                data = json.load(f)
+            with open(saved, "w") as f:
+                json.dump(data, f, indent=indent)
+
+    return {"path": path, "time": time.perf_counter() - start, "changes": changes, "problems": problems, "saved": saved}
+
+def main():
+    parser = argparse.ArgumentParser(description="validate, autotile, convert and save every map in a directory")
+    parser.add_argument("maps", nargs="?", default=MAP_DIR)
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("-o", "--out", help="write fixed maps here instead of overwriting them")
+    parser.add_argument("--check", action="store_true", help="only validate, never write")
+    parser.add_argument("--no-autotile", action="store_true")
+    parser.add_argument("--indent", type=int)
+    args = parser.parse_args()
+
+    paths = sorted(os.path.join(args.maps, name) for name in os.listdir(args.maps) if name.endswith(".json"))
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+
+    start = time.perf_counter()
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.jobs, initializer=init_worker) as pool:
+        futures = [pool.submit(process_map, path, args.out, not args.no_autotile, not args.check, args.indent) for path in paths]
+        for path, future in zip(paths, futures):
+            try:
+                result = future.result()
+            except Exception as e: # anything process_map didn't turn into a problem itself
+                result = {"path": path, "time": 0, "changes": 0, "problems": ["failed: " + repr(e)], "saved": None}
+            status = "ok" if not result["problems"] else str(len(result["problems"])) + " problem(s)"
+            if result["changes"]:
+                status += ", " + str(result["changes"]) + " converted"
+            if result["saved"]:
+                status += ", saved " + result["saved"]
+            print(f"{result['time'] * 1000:8.1f} ms  {result['path']}  {status}")
+            for problem in result["problems"]:
+                print("            " + problem)
+            if result["problems"]:
+                failed += 1
+
+    print(f"{len(paths)} map(s), {failed} with problems, {time.perf_counter() - start:.2f} s total")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
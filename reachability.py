@@ -0,0 +1,199 @@
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import pygame
+
+from scripts.tilemap import Tilemap
+from scripts.entities import Player
+from scripts.headless import HeadlessGame
+from scripts.level_loader import MAP_PATH, SPAWNER_IDS
+
+MOVE_FRAMES = 8 # frames each input is held for
+JUMP_RELEASE = 3 # frame a short jump lets go of space on
+MOVES = [(direction, jump) for direction in [-1, 0, 1] for jump in [None, "short", "hold"]]
+TARGET_SIZES = {1: ("door", [9, 19]), 2: ("snowglobe", [8, 10])}
+
+context = None
+
+class StaticTilemap(Tilemap):
+    # the map never changes during a search, so the grid part of the physics
+    # rects only has to be built once per tile cell
+    def __init__(self, game, tile_size=16):
+        super().__init__(game, tile_size=tile_size)
+        self.rect_cache = {}
+
+    def physics_rects_around(self, pos):
+        tile_loc = (int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
+        if tile_loc not in self.rect_cache:
+            rects = []
+            for tile in self.tiles_around(pos):
+                if tile["group"] in self.PHYSICS_TILES:
+                    rects.append(pygame.Rect(tile["pos"][0] * self.tile_size, tile["pos"][1] * self.tile_size, self.tile_size, self.tile_size))
+            self.rect_cache[tile_loc] = rects
+        rects = list(self.rect_cache[tile_loc])
+        for tile in self.offgrid_tiles_around(pos):
+            rects.append(pygame.Rect(tile[0][0], tile[0][1], tile[1][0], tile[1][1]))
+        return rects
+
+class Context:
+    def __init__(self, map_path):
+        self.game = HeadlessGame()
+        self.tilemap = StaticTilemap(self.game, tile_size=8)
+        self.tilemap.load(map_path)
+        self.spawners = self.tilemap.extract(SPAWNER_IDS)
+
+        self.targets = []
+        for spawner in self.spawners:
+            if spawner["part"] in TARGET_SIZES:
+                name, size = TARGET_SIZES[spawner["part"]]
+                self.targets.append((name, pygame.Rect(spawner["pos"], size)))
+
+        self.bounds = self.tilemap.bounds().inflate(128, 128)
+        self.player = Player(self.game, (0, 0), [6, 14])
+
+def init_worker(map_path):
+    global context
+    context = Context(map_path)
+
+def save_state(player):
+    return (player.pos[0], player.pos[1], player.velocity[0], player.velocity[1], player.air_time, player.jumps, player.jump_buffer,
+            player.wall_slide, player.slide_counter, player.jump_effect, player.space_bar, player.flip, player.last_movement[0],
+            player.action, player.animation.frame)
+
+def load_state(player, state):
+    (x, y, vx, vy, player.air_time, player.jumps, player.jump_buffer, player.wall_slide, player.slide_counter,
+     player.jump_effect, player.space_bar, player.flip, last_x, action, frame) = state
+    player.pos = [x, y]
+    player.velocity = [vx, vy]
+    player.last_movement = (last_x, 0)
+    player.set_action(action)
+    player.animation.frame = frame
+
+def state_key(state, cell):
+    # states that land in the same bucket are treated as the same state. last_movement and
+    # jump_effect stay in, wall jumps and vary_jump depend on them
+    return (round(state[0] / cell), round(state[1] / cell), round(state[2] * 2), round(state[3] * 2),
+            state[5], min(state[7], 2), state[6] > 0, state[9], state[10], state[11], state[12])
+
+def simulate(state, move):
+    # plays one held input from state, returns the new state (None if the player fell
+    # out of the level) and the indices of the targets touched on the way
+    player = context.player
+    load_state(player, state)
+    direction, jump = move
+    player.movement = [direction < 0, direction > 0]
+
+    if jump and not player.space_bar:
+        player.space_bar = True
+        player.jump()
+    if not jump and player.space_bar:
+        player.space_bar = False
+        player.vary_jump()
+
+    touched = set()
+    for frame in range(MOVE_FRAMES):
+        if jump == "short" and frame == JUMP_RELEASE:
+            player.space_bar = False
+            player.vary_jump()
+        player.update(context.tilemap)
+        rect = player.rect()
+        for i, (name, target) in enumerate(context.targets):
+            if rect.colliderect(target):
+                touched.add(i)
+        if not context.bounds.collidepoint(player.pos):
+            return None, touched
+    return save_state(player), touched
+
+def expand(states):
+    results = []
+    for state in states:
+        for move in MOVES:
+            child, touched = simulate(state, move)
+            results.append((state, move, child, touched))
+    return results
+
+def analyze(map_path, spawn=None, jobs=None, cell=2, max_states=200000, max_depth=60):
+    start = time.perf_counter()
+    init_worker(map_path)
+    if spawn is None:
+        spawns = [spawner["pos"] for spawner in context.spawners if spawner["part"] == 0]
+        if not spawns:
+            return {"path": map_path, "error": "no player spawner, pass --spawn x,y", "time": time.perf_counter() - start}
+        spawn = spawns[0]
+
+    player = context.player
+    player.pos = list(spawn)
+    root = save_state(player)
+    parents = {state_key(root, cell): None}
+    reached = {}
+    frontier = [root]
+    depth = 0
+
+    workers = jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(map_path,)) as pool:
+        while frontier and len(reached) < len(context.targets) and depth < max_depth and len(parents) < max_states:
+            depth += 1
+            chunk = max(1, len(frontier) // (workers * 4))
+            batches = [frontier[i:i + chunk] for i in range(0, len(frontier), chunk)]
+            frontier = []
+            for results in pool.map(expand, batches):
+                for state, move, child, touched in results:
+                    for i in touched:
+                        if i not in reached:
+                            reached[i] = (depth, state_key(state, cell), move)
+                    if child is None:
+                        continue
+                    key = state_key(child, cell)
+                    if key not in parents:
+                        parents[key] = (state_key(state, cell), move)
+                        frontier.append(child)
+
+    targets = []
+    for i, (name, rect) in enumerate(context.targets):
+        if i in reached:
+            depth, key, move = reached[i]
+            moves = [move]
+            while parents[key]:
+                key, move = parents[key]
+                moves.append(move)
+            targets.append((name, rect.topleft, list(reversed(moves))))
+        else:
+            targets.append((name, rect.topleft, None))
+
+    return {"path": map_path, "spawn": spawn, "targets": targets, "states": len(parents), "time": time.perf_counter() - start}
+
+def describe(move):
+    direction, jump = move
+    return {-1: "L", 0: ".", 1: "R"}[direction] + {None: "", "short": "j", "hold": "J"}[jump]
+
+def main():
+    parser = argparse.ArgumentParser(description="check that the exits and snowglobes of a level can be reached from the spawn")
+    parser.add_argument("maps", nargs="*", default=[MAP_PATH + "0.json"])
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--spawn", help="x,y to start from instead of the player spawner")
+    parser.add_argument("--cell", type=float, default=2, help="position bucket size in pixels for the state cache")
+    parser.add_argument("--max-states", type=int, default=200000)
+    args = parser.parse_args()
+
+    spawn = [float(v) for v in args.spawn.split(",")] if args.spawn else None
+    failed = 0
+    for path in args.maps:
+        result = analyze(path, spawn, args.jobs, args.cell, args.max_states)
+        if "error" in result:
+            print(path + ": " + result["error"])
+            failed += 1
+            continue
+        print(f"{path}: spawn {result['spawn']}, {result['states']} states in {result['time']:.2f} s")
+        for name, pos, moves in result["targets"]:
+            if moves is None:
+                print(f"  {name} at {pos}: UNREACHABLE")
+                failed += 1
+            else:
+                print(f"  {name} at {pos}: reachable in {len(moves)} moves ({len(moves) * MOVE_FRAMES} frames)  " + " ".join(describe(move) for move in moves))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+
+import pygame
+
+from scripts.utils import BASE_IMG_PATH, Animation, TileAnimation, load_spritesheet
+
+# key: (kind, path, options, tags)
+#   "spritesheet" / "image": one png, "images" / "animation": every png in a folder, "blank": one plain surface of size path as a one part group
+#   "tile_animation": a spritesheet with one row per part and one column per frame, tag it "animated"
+#   e.g. "torch": ("tile_animation", "tiles/torch.png", {"img_dur": 8}, ["tile", "animated"])
+ASSET_TABLE = {
+    "snow": ("spritesheet", "tiles/fg/snow.png", {}, ["tile", "autotile", "physics"]),
+    "stone": ("spritesheet", "tiles/fg/stone.png", {}, ["tile", "autotile", "physics"]),
+    "cobblestone": ("spritesheet", "tiles/fg/cobblestone.png", {}, ["tile", "autotile", "physics"]),
+    "brick": ("spritesheet", "tiles/fg/brick.png", {}, ["tile", "autotile", "physics"]),
+
+    "barrier": ("blank", (8, 8), {}, ["tile", "physics"]),
+
+    "snow_bg": ("spritesheet", "tiles/bg/snow_bg.png", {}, ["tile", "autotile"]),
+
+    "resize": ("images", "tiles/resize", {}, ["tile", "physics"]),
+    "decor": ("images", "tiles/decor", {}, ["tile"]),
+
+    "spawners": ("images", "tiles/spawners", {}, ["tile", "entity"]),
+
+    "player@idle": ("animation", "entities/player/idle", {"img_dur": 6, "anim_offset": [-1, -2], "size_tweak": [-2, -2]}, ["animation"]),
+    "player@run": ("animation", "entities/player/run", {"img_dur": 4, "anim_offset": [-1, -2], "size_tweak": [-2, -2]}, ["animation"]),
+    "player@rising": ("animation", "entities/player/rising", {"img_dur": 6, "anim_offset": [-1, -2], "size_tweak": [-2, -2]}, ["animation"]),
+    "player@falling": ("animation", "entities/player/falling", {"img_dur": 6, "anim_offset": [-1, -2], "size_tweak": [-2, -2]}, ["animation"]),
+    "player@wall_slide": ("animation", "entities/player/wall_cling", {"img_dur": 15, "anim_offset": [0, -2], "size_tweak": [0, -1]}, ["animation"]),
+
+    "door@idle": ("animation", "entities/door/idle", {}, ["animation"]),
+    "snowglobe@idle": ("animation", "entities/snow_globe/idle", {}, ["animation"]),
+    "sign@idle": ("animation", "entities/sign/idle", {}, ["animation"]),
+
+    "particle.warning": ("image", "particle/warning.png", {}, ["particle"]),
+
+    "background": ("image", "background.png", {}, ["background"]),
+
+    "font": ("image", "pixel_font.png", {}, ["font"]),
+}
+
+# below this much png data the thread pool costs more than it saves
+PARALLEL_MIN_BYTES = 256 * 1024
+
+def scan_images(base=BASE_IMG_PATH):
+    # one walk over the art folder instead of an os.listdir per group, also
+    # returns the file sizes so the loader can tell if threads are worth it
+    listing = {}
+    sizes = {}
+    for root, dirs, files in os.walk(base):
+        folder = os.path.relpath(root, base).replace(os.sep, "/")
+        listing[folder] = sorted(files)
+        for name in files:
+            path = name if folder == "." else folder + "/" + name
+            sizes[path] = os.path.getsize(os.path.join(root, name))
+    return listing, sizes
+
+class InlinePool:
+    # same interface as the executor, for loads too small to be worth threading
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+def decode(path):
+    start = time.perf_counter()
+    return pygame.image.load(BASE_IMG_PATH + path), time.perf_counter() - start
+
+def finalize(surf, colorkey=(0, 0, 0)):
+    img = surf.convert()
+    img.set_colorkey(colorkey)
+    return img
+
+class AssetLoader:
+    # png decoding runs on a thread pool, convert()/colorkey and building the
+    # groups stays on the main thread since it needs the display
+    def __init__(self, table=ASSET_TABLE, workers=None, progress=None):
+        self.table = table
+        self.workers = workers
+        self.progress = progress
+        self.timings = {}
+        self.total = 0
+        self.threaded = False
+
+    def files(self, kind, path, listing):
+        if kind in ["spritesheet", "image", "tile_animation"]:
+            return [path]
+        if kind in ["images", "animation"]:
+            return [path + "/" + name for name in listing.get(path, [])]
+        return []
+
+    def build(self, kind, path, options, surfs):
+        if kind == "spritesheet":
+            return load_spritesheet(finalize(surfs[0]))
+        if kind == "image":
+            return finalize(surfs[0])
+        if kind == "tile_animation":
+            return TileAnimation(load_spritesheet(finalize(surfs[0]), two_d=True), **options)
+        if kind == "images":
+            return [finalize(surf) for surf in surfs]
+        if kind == "animation":
+            return Animation([finalize(surf) for surf in surfs], **options)
+        if kind == "blank":
+            return [pygame.Surface(path)] # a one part tile group
+
+    def load(self, keys=None):
+        start = time.perf_counter()
+        keys = list(keys or self.table)
+        listing, sizes = scan_images()
+        files = {key: self.files(self.table[key][0], self.table[key][1], listing) for key in keys}
+
+        threaded = self.workers != 0 and (os.cpu_count() or 1) > 1 and sum(sizes.get(file, 0) for key in keys for file in files[key]) >= PARALLEL_MIN_BYTES
+        assets = {}
+        with ThreadPoolExecutor(max_workers=self.workers) if threaded else InlinePool() as pool:
+            jobs = {key: [pool.submit(decode, file) for file in files[key]] for key in keys}
+
+            for i, key in enumerate(keys):
+                kind, path, options, tags = self.table[key]
+                decoded = [job.result() for job in jobs[key]]
+                group_start = time.perf_counter()
+                assets[key] = (self.build(kind, path, options, [surf for surf, t in decoded]), tags)
+                # decode time is spent on the pool, build time on the main thread
+                self.timings[key] = (sum(t for surf, t in decoded), time.perf_counter() - group_start)
+                if self.progress:
+                    self.progress(i + 1, len(keys))
+
+        self.threaded = threaded
+        self.total = time.perf_counter() - start
+        return assets
+
+    def report(self):
+        lines = ["asset load: " + str(round(self.total * 1000, 1)) + " ms" + (" (threaded)" if self.threaded else " (inline, art too small for threads)")]
+        for key, (decode_time, build_time) in sorted(self.timings.items(), key=lambda item: -sum(item[1])):
+            lines.append(f"  {key:<20} decode {decode_time * 1000:6.2f} ms  build {build_time * 1000:6.2f} ms")
+        return "\n".join(lines)
+
+# needs a display mode to be set first, every surface gets converted
+def load_assets(progress=None, workers=None):
+    return AssetLoader(workers=workers, progress=progress).load()
@@ -0,0 +1,67 @@
+import random
+import pygame
+
+class Camera:
+    def __init__(self, size, speed=13, deadzone=(0, 0), margin=16):
+        self.size = size
+        self.speed = speed # LOWER = FASTER
+        self.deadzone = deadzone # half extents around the view center the target can move in without dragging the camera
+        self.margin = margin
+        self.scroll = [0, 0]
+        self.bounds = None
+        self.screenshake = 0
+
+        self.view = pygame.Rect(0, 0, size[0], size[1])
+        self.visible = self.view.inflate(margin * 2, margin * 2)
+
+    def set_bounds(self, bounds):
+        # world rect the view is kept inside, None to roam freely
+        self.bounds = bounds
+
+    def render_scroll(self):
+        return (int(self.scroll[0]), int(self.scroll[1]))
+
+    def distance_to(self, target_rect):
+        distance = [target_rect.centerx - self.size[0] / 2 - self.scroll[0], target_rect.centery - self.size[1] / 2 - self.scroll[1]]
+        for axis in range(2):
+            if abs(distance[axis]) <= self.deadzone[axis]:
+                distance[axis] = 0
+            else:
+                distance[axis] -= self.deadzone[axis] if distance[axis] > 0 else -self.deadzone[axis]
+        return distance
+
+    def clamp(self):
+        if not self.bounds:
+            return
+        for axis in range(2):
+            low = self.bounds.topleft[axis]
+            high = self.bounds.bottomright[axis] - self.size[axis]
+            if high < low:
+                self.scroll[axis] = (low + high) / 2
+            else:
+                self.scroll[axis] = min(max(self.scroll[axis], low), high)
+
+    def update_view(self):
+        self.view.topleft = self.render_scroll()
+        self.visible = self.view.inflate(self.margin * 2, self.margin * 2)
+
+    def snap(self, target_rect):
+        distance = self.distance_to(target_rect)
+        self.scroll[0] += distance[0]
+        self.scroll[1] += distance[1]
+        self.clamp()
+        self.update_view()
+
+    def update(self, target_rect):
+        self.screenshake = max(0, self.screenshake - 1)
+        distance = self.distance_to(target_rect)
+        self.scroll[0] += distance[0] / self.speed
+        self.scroll[1] += distance[1] / self.speed
+        self.clamp()
+        self.update_view()
+
+    def is_visible(self, rect):
+        return self.visible.colliderect(rect)
+
+    def shake_offset(self):
+        return (random.random() * self.screenshake - self.screenshake / 2, random.random() * self.screenshake - self.screenshake / 2)
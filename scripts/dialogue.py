@@ -0,0 +1,39 @@
+import pygame
+
+from scripts.text import TextLayout, Typewriter
+
+class DialogueBox:
+    def __init__(self, font, string, width, lines_per_page=3, padding=16, speed=0.5):
+        self.padding = padding
+        self.speed = speed
+
+        text_width = width - padding * 2
+        lines = TextLayout(font, string, text_width).lines
+        self.pages = []
+        for i in range(0, len(lines), lines_per_page):
+            self.pages.append(TextLayout(font, "\n".join(lines[i:i + lines_per_page]), text_width))
+        self.page = 0
+        self.typewriter = Typewriter(self.pages[0], speed)
+
+        # the frame never changes, only the typewriter surface on top of it does
+        self.box = pygame.Surface((width, self.pages[0].line_height * lines_per_page + padding * 2))
+        self.box.fill((1, 1, 1))
+        pygame.draw.rect(self.box, (255, 255, 255), self.box.get_rect(), 4)
+
+    def update(self):
+        self.typewriter.update()
+
+    def advance(self):
+        # skip the typing, then flip pages, returns False once the last page is dismissed
+        if not self.typewriter.done():
+            self.typewriter.skip()
+            return True
+        if self.page + 1 < len(self.pages):
+            self.page += 1
+            self.typewriter = Typewriter(self.pages[self.page], self.speed)
+            return True
+        return False
+
+    def render(self, surf, pos):
+        surf.blit(self.box, pos)
+        surf.blit(self.typewriter.surf, (pos[0] + self.padding, pos[1] + self.padding))
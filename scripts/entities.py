@@ -65,8 +65,11 @@ class ParticleSpawner:
                 self.temp.append(particle)
         self.particles = self.temp.copy()
     
-    def render(self, surf, offset=[0, 0]):
+    def render(self, surf, offset=[0, 0], visible=None):
+        # visible is the camera's world rect, particles outside it are skipped
         for particle in self.particles:
+            if visible and not visible.collidepoint(particle.px, particle.py):
+                continue
             surf.blit(particle.image, (particle.px - offset[0], particle.py - offset[1]))
 
 class PhysicsEntity:
@@ -161,7 +164,7 @@ class Player(PhysicsEntity):
         self.dialogue = False
 
     def update(self, tilemap):
-        movement = (self.movement[1] - self.movement[0], 0)
+        movement = (self.movement[1] - self.movement[0], 0) if not self.dialogue else (0, 0)
         super().update(tilemap, movement=movement)
 
         if self.velocity[1] >= 0:
@@ -259,6 +262,13 @@ class Player(PhysicsEntity):
             self.velocity[1] = max(-0.5, self.velocity[1])
             self.jump_effect = False
 
+RECT_MASKS = {}
+
+def rect_mask(size):
+    if size not in RECT_MASKS:
+        RECT_MASKS[size] = pygame.Mask(size, fill=True)
+    return RECT_MASKS[size]
+
 class InteractEntity:
     def __init__(self, game, asset_id, pos, size):
         self.game = game
@@ -280,19 +290,24 @@ class InteractEntity:
         if action != self.action:
             self.action = action
             self.animation = self.game.assets[self.asset_id + "@" + self.action][0].copy()
+            anim_size = self.animation.img().get_size()
+            size_tweak = self.animation.size_tweak
+            self.size = [anim_size[0] + size_tweak[0], anim_size[1] + size_tweak[1]]
+
+    def overlaps(self, rect):
+        # bounding box first, then the cached mask of the current frame against a solid
+        # mask of rect's size, so the sprite's transparent corners don't count
+        img_pos = (round(self.pos[0] + self.anim_offset[0]), round(self.pos[1] + self.anim_offset[1]))
+        img_size = self.animation.img().get_size()
+        if not rect.colliderect((img_pos, img_size)):
+            return False
+        return self.animation.mask(self.flip).overlap(rect_mask(rect.size), (rect.x - img_pos[0], rect.y - img_pos[1])) is not None
 
     def update(self):
-        anim_size = self.animation.img().get_size()
-        size_tweak = self.animation.size_tweak
-        self.size = [anim_size[0] + size_tweak[0], anim_size[1] + size_tweak[1]]
-
         self.animation.update()
         self.anim_offset = self.animation.anim_offset.copy()
-        
-        if pygame.Rect.colliderect(self.game.player.rect(), self.rect()):
-            self.colliding = True
-        else:
-            self.colliding = False
+
+        self.colliding = self.overlaps(self.game.player.rect())
 
     def render(self, surf, offset=(0, 0)):
         surf.blit(pygame.transform.flip(self.animation.img(), self.flip, False), (round(self.pos[0] - offset[0] + self.anim_offset[0]), round(self.pos[1] - offset[1] + self.anim_offset[1])))
@@ -308,7 +323,7 @@ class Door(InteractEntity):
         
         if self.colliding and self.game.interacting == True:
             self.game.interacting = False
-            self.game.transition(text(self.game.assets["font"][0], desiredText="you left the north pole.", color=(255, 255, 255), scale=5), 2)
+            self.game.transition(text(self.game.assets["font"][0], desiredText="you left the north pole.", color=(255, 255, 255), scale=5), 2, next_level=self.game.level + 1)
     
     def render(self, surf, offset=(0, 0)):
         surf.blit(pygame.transform.flip(self.animation.img(), self.flip, False), (self.pos[0] - offset[0] + self.anim_offset[0], self.pos[1] - offset[1] + self.anim_offset[1]))
@@ -329,4 +344,8 @@ class Sign(InteractEntity):
         super().__init__(game, "sign", pos, size)
         self.text = text
     def update(self):
-        super().update()
\ No newline at end of file
+        super().update()
+
+        if self.colliding and self.game.interacting == True:
+            self.game.interacting = False
+            self.game.open_dialogue(self.text)
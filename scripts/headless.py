@@ -0,0 +1,16 @@
+import os
+
+import pygame
+
+from scripts.assets import load_assets
+
+class HeadlessGame:
+    # stands in for Game in offline tools, no window is ever shown
+    def __init__(self):
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        pygame.display.init()
+        pygame.display.set_mode((1, 1))
+
+        self.type = "headless"
+        self.canvas_size = (160, 120)
+        self.assets = load_assets()
@@ -0,0 +1,90 @@
+import os
+
+from scripts.utils import BASE_IMG_PATH, Animation, TileAnimation
+from scripts.assets import ASSET_TABLE, AssetLoader
+from scripts.level_loader import MAP_PATH, LevelLoader
+
+class HotReloader:
+    # polls mtimes under data/images and data/maps and reloads only what changed,
+    # patching game.assets and the tilemap in place so running animations and the
+    # player's position survive
+    def __init__(self, game, interval=20):
+        self.game = game
+        self.interval = interval # frames between polls
+        self.timer = 0
+        self.mtimes = self.scan()
+        self.loader = LevelLoader(game) # separate from game.loader so a pending door preload is left alone
+
+    def scan(self):
+        mtimes = {}
+        for base in [BASE_IMG_PATH, MAP_PATH]:
+            for root, dirs, files in os.walk(base):
+                for name in files:
+                    path = os.path.join(root, name).replace(os.sep, "/")
+                    mtimes[path] = os.stat(path).st_mtime_ns
+        return mtimes
+
+    def update(self):
+        self.timer += 1
+        if self.timer < self.interval:
+            return
+        self.timer = 0
+
+        mtimes = self.scan()
+        changed = {path for path in set(mtimes) | set(self.mtimes) if mtimes.get(path) != self.mtimes.get(path)}
+        self.mtimes = mtimes
+        if not changed:
+            return
+
+        keys = set()
+        for path in changed:
+            if path.startswith(MAP_PATH):
+                self.reload_map(path)
+            else:
+                keys.update(self.asset_keys(path[len(BASE_IMG_PATH):]))
+        if keys:
+            self.reload_assets(keys)
+
+    def asset_keys(self, path):
+        keys = []
+        for key, (kind, asset_path, options, tags) in ASSET_TABLE.items():
+            if kind in ["spritesheet", "image", "tile_animation"] and path == asset_path:
+                keys.append(key)
+            if kind in ["images", "animation"] and path.startswith(asset_path + "/"):
+                keys.append(key)
+        return keys
+
+    def reload_assets(self, keys):
+        try:
+            fresh = AssetLoader(workers=0).load(keys)
+        except Exception as e: # half written png, try again on the next change
+            print("hot reload failed: " + repr(e))
+            return
+
+        for key in keys:
+            old, tags = self.game.assets[key]
+            new = fresh[key][0]
+            if isinstance(old, Animation):
+                old.images[:] = new.images # shared with every Animation.copy() in use
+                old.masks[:] = new.masks
+            elif isinstance(old, TileAnimation):
+                old[:] = new
+                old.frames[:] = new.frames
+            elif isinstance(old, list):
+                old[:] = new
+            else:
+                self.game.assets[key] = (new, tags)
+            print("reloaded " + key)
+
+        self.game.assets_changed(keys)
+
+    def reload_map(self, path):
+        if path != MAP_PATH + str(self.game.level) + ".json" or not os.path.exists(path):
+            return
+        try:
+            self.loader.request(self.game.level)
+            self.game.apply_level(self.loader.wait(), keep_player=True)
+        except Exception as e:
+            print("hot reload failed: " + repr(e))
+            return
+        print("reloaded " + path)
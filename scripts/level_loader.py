@@ -0,0 +1,65 @@
+import threading
+
+from scripts.tilemap import Tilemap
+from scripts.tilequery import TileQuery
+
+MAP_PATH = "data/maps/"
+SPAWNER_IDS = [("spawners", 0), ("spawners", 1), ("spawners", 2), ("spawners", 3)]
+
+class LoadedLevel:
+    def __init__(self, map_id, tilemap, spawners, tilequery, bounds):
+        self.map_id = map_id
+        self.tilemap = tilemap
+        self.spawners = spawners
+        self.tilequery = tilequery
+        self.bounds = bounds
+
+class LoadJob:
+    # one request, its thread only ever writes here, so a replaced request can't leak its result
+    def __init__(self, map_id):
+        self.map_id = map_id
+        self.thread = None
+        self.result = None
+        self.error = None
+
+class LevelLoader:
+    # file i/o, json parsing, spawner extraction and anything else that walks every
+    # tile happen on a worker thread, the main thread only polls ready() and picks up
+    # the finished level
+    def __init__(self, game):
+        self.game = game
+        self.job = None
+
+    def request(self, map_id):
+        # replaces any other pending request, whose thread then finishes into a job nobody reads
+        if self.job and self.job.map_id == map_id:
+            return
+        self.job = LoadJob(map_id)
+        self.job.thread = threading.Thread(target=self._load, args=(self.job,), daemon=True)
+        self.job.thread.start()
+
+    def _load(self, job):
+        try:
+            tilemap = Tilemap(self.game, tile_size=self.game.tilemap.tile_size)
+            tilemap.load(MAP_PATH + str(job.map_id) + ".json")
+            spawners = tilemap.extract(SPAWNER_IDS)
+            job.result = LoadedLevel(job.map_id, tilemap, spawners, TileQuery(tilemap), tilemap.bounds())
+        except Exception as e:
+            job.error = e
+
+    def pending(self):
+        return self.job is not None
+
+    def ready(self):
+        return self.pending() and not self.job.thread.is_alive()
+
+    def wait(self):
+        if self.job:
+            self.job.thread.join()
+        return self.take()
+
+    def take(self):
+        job, self.job = self.job, None
+        if job.error:
+            raise job.error
+        return job.result
@@ -0,0 +1,67 @@
+import numpy as np
+import pygame
+
+from scripts.scroll_layer import ScrollLayer
+
+AMBIENT = (150, 155, 190) # what unlit parts of the level are multiplied by
+LIGHTS = { # asset_id: (radius, color)
+    "door": (40, (255, 190, 120)),
+    "snowglobe": (26, (110, 160, 255)),
+    "player": (30, (70, 70, 55)),
+}
+
+def light_texture(radius, color):
+    # quadratic falloff from color at the center to black at radius
+    offsets = np.arange(radius * 2) - radius + 0.5
+    dist = np.hypot(offsets[:, None], offsets[None, :]) / radius
+    falloff = np.clip(1 - dist, 0, 1) ** 2
+    surf = pygame.Surface((radius * 2, radius * 2))
+    pixels = pygame.surfarray.pixels3d(surf)
+    pixels[...] = (falloff[..., None] * np.array(color, dtype=float)).astype(np.uint8)
+    del pixels # unlocks surf
+    return surf
+
+class Lighting:
+    # light textures are built once per (radius, color). static lights are added into a
+    # scroll layer filled with the ambient color, so they only get redrawn for the strips
+    # the camera exposes. each frame that layer is copied into the darkness surface, the
+    # dynamic lights are added on top, and the result multiplies the canvas in one blit
+    def __init__(self, size, ambient=AMBIENT):
+        self.ambient = ambient
+        self.textures = {}
+        self.static = [] # (center, radius, color) in world pixels
+        self.lights = [] # same, cleared after every apply()
+        self.baked = ScrollLayer(self.render, size, fill=ambient)
+        self.darkness = pygame.Surface(size)
+
+    def texture(self, radius, color):
+        key = (radius, tuple(color))
+        if key not in self.textures:
+            self.textures[key] = light_texture(radius, color)
+        return self.textures[key]
+
+    def set_static(self, lights):
+        self.static = [((int(pos[0]), int(pos[1])), radius, tuple(color)) for pos, radius, color in lights]
+        self.baked.invalidate()
+
+    def add(self, pos, radius, color):
+        self.lights.append(((int(pos[0]), int(pos[1])), radius, color))
+
+    def light_blits(self, lights, offset, view):
+        blits = []
+        for pos, radius, color in lights:
+            corner = (pos[0] - radius - offset[0], pos[1] - radius - offset[1])
+            if view.colliderect(corner, (radius * 2, radius * 2)):
+                blits.append((self.texture(radius, color), corner, None, pygame.BLEND_ADD))
+        return blits
+
+    def render(self, surf, offset=(0, 0), area=None):
+        # draws the static lights, called by the scroll layer for the strips it redraws
+        surf.blits(self.light_blits(self.static, offset, area or surf.get_rect()), doreturn=False)
+
+    def apply(self, surf, render_scroll):
+        self.baked.update(render_scroll)
+        self.darkness.blit(self.baked.surf, (0, 0))
+        self.darkness.blits(self.light_blits(self.lights, render_scroll, self.darkness.get_rect()), doreturn=False)
+        self.lights.clear()
+        surf.blit(self.darkness, (0, 0), special_flags=pygame.BLEND_MULT)
@@ -0,0 +1,149 @@
+import hashlib
+from collections import Counter, deque
+
+import pygame
+
+from scripts.utils import Animation, TileAnimation
+
+SURFACE = pygame.Surface # the real class, install() swaps pygame.Surface for a counting subclass
+TRANSFORMS = ["scale", "smoothscale", "scale_by", "flip", "rotate", "rotozoom"]
+
+def surface_bytes(surf):
+    return surf.get_pitch() * surf.get_height()
+
+def surface_format(surf):
+    fmt = str(surf.get_bitsize()) + "bpp"
+    if surf.get_flags() & pygame.SRCALPHA:
+        fmt += " alpha"
+    if surf.get_colorkey():
+        fmt += " colorkey"
+    return fmt
+
+def iter_surfaces(entry):
+    if isinstance(entry, SURFACE):
+        yield entry
+    elif isinstance(entry, Animation):
+        yield from entry.images
+    elif isinstance(entry, TileAnimation):
+        for frames in entry.frames:
+            yield from frames
+    elif isinstance(entry, (list, tuple)):
+        for item in entry:
+            yield from iter_surfaces(item)
+
+class AssetStats:
+    # bytes per asset group broken down by pixel format and size, plus surfaces
+    # that hold identical pixels but were loaded separately
+    def __init__(self, assets):
+        self.groups = {}
+        self.duplicates = []
+        seen = set()
+        digests = {}
+
+        for key in assets:
+            group = {"surfaces": 0, "bytes": 0, "formats": Counter(), "sizes": Counter()}
+            for i, surf in enumerate(iter_surfaces(assets[key][0])):
+                if id(surf) in seen: # shared, not loaded twice
+                    continue
+                seen.add(id(surf))
+                group["surfaces"] += 1
+                group["bytes"] += surface_bytes(surf)
+                group["formats"][surface_format(surf)] += surface_bytes(surf)
+                group["sizes"][surf.get_size()] += 1
+
+                digest = hashlib.blake2b(str(surf.get_size()).encode() + pygame.image.tobytes(surf, "RGBA"), digest_size=16).digest()
+                digests.setdefault(digest, []).append((key, i))
+            self.groups[key] = group
+
+        for where in digests.values():
+            if len(where) > 1:
+                self.duplicates.append(where)
+
+    def total_bytes(self):
+        return sum(group["bytes"] for group in self.groups.values())
+
+    def wasted_bytes(self, assets):
+        wasted = 0
+        for where in self.duplicates:
+            key, i = where[0]
+            wasted += surface_bytes(list(iter_surfaces(assets[key][0]))[i]) * (len(where) - 1)
+        return wasted
+
+class AllocationCounter:
+    # counts surfaces created through pygame.Surface(), pygame.transform and
+    # pygame.image.load, plus Animation.copy, per frame of the main loop.
+    # Surface.copy/subsurface on loaded images can't be hooked (C type) and aren't counted
+    def __init__(self, history=120):
+        self.current = Counter()
+        self.frames = deque(maxlen=history)
+        self.originals = {}
+
+    def count(self, tag):
+        self.current[tag] += 1
+
+    def wrap(self, module, name, tag):
+        original = getattr(module, name)
+        self.originals[(module, name)] = original
+        def counted(*args, **kwargs):
+            self.current[tag] += 1
+            return original(*args, **kwargs)
+        setattr(module, name, counted)
+
+    def install(self):
+        counter = self
+        class CountedSurface(SURFACE):
+            def __init__(self, *args, **kwargs):
+                counter.current["Surface"] += 1
+                super().__init__(*args, **kwargs)
+        self.originals[(pygame, "Surface")] = SURFACE
+        pygame.Surface = CountedSurface
+
+        for name in TRANSFORMS:
+            if hasattr(pygame.transform, name):
+                self.wrap(pygame.transform, name, "transform." + name)
+        self.wrap(pygame.image, "load", "image.load")
+        self.wrap(Animation, "copy", "Animation.copy")
+
+    def uninstall(self):
+        for (module, name), original in self.originals.items():
+            setattr(module, name, original)
+        self.originals = {}
+
+    def frame(self):
+        self.frames.append(self.current)
+        self.current = Counter()
+
+    def last_frame(self):
+        return self.frames[-1] if self.frames else Counter()
+
+    def per_frame(self):
+        total = Counter()
+        for frame in self.frames:
+            total.update(frame)
+        return {tag: total[tag] / len(self.frames) for tag in total}
+
+    def peak(self):
+        peak = Counter()
+        for frame in self.frames:
+            for tag in frame:
+                peak[tag] = max(peak[tag], frame[tag])
+        return peak
+
+def report(assets, counter=None):
+    stats = AssetStats(assets)
+    lines = ["asset memory: " + str(round(stats.total_bytes() / 1024, 1)) + " KiB in " + str(len(stats.groups)) + " groups"]
+    for key, group in sorted(stats.groups.items(), key=lambda item: -item[1]["bytes"]):
+        formats = ", ".join(fmt + " " + str(round(size / 1024, 1)) + " KiB" for fmt, size in group["formats"].items())
+        sizes = ", ".join(str(size[0]) + "x" + str(size[1]) + (" *" + str(n) if n > 1 else "") for size, n in group["sizes"].most_common(4))
+        lines.append(f"  {key:<20} {group['surfaces']:>4} surf {group['bytes'] / 1024:>8.1f} KiB  [{formats}]  {sizes}")
+
+    lines.append("duplicate pixel data: " + str(len(stats.duplicates)) + " sets, " + str(round(stats.wasted_bytes(assets) / 1024, 1)) + " KiB wasted")
+    for where in stats.duplicates:
+        lines.append("  " + ", ".join(key + "[" + str(i) + "]" for key, i in where))
+
+    if counter and counter.frames:
+        peak = counter.peak()
+        lines.append("transient allocations per frame (last " + str(len(counter.frames)) + " frames):")
+        for tag, average in sorted(counter.per_frame().items(), key=lambda item: -item[1]):
+            lines.append(f"  {tag:<20} avg {average:6.2f}  peak {peak[tag]}")
+    return "\n".join(lines)
@@ -0,0 +1,118 @@
+import numpy as np
+
+UP, DOWN, RIGHT, LEFT = range(4) # columns of PhysicsWorld.collisions
+
+class PhysicsWorld:
+    # PhysicsEntity bodies kept as rows of numpy arrays and stepped all at once. same rules
+    # as PhysicsEntity.update: move and resolve x, then y, against the physics tiles with
+    # rects truncated like pygame.Rect, then gravity capped at max_fall and zeroed on
+    # floor/ceiling hits. call rebuild() after the tilemap (and its TileQuery) changes
+    def __init__(self, tilequery, capacity=64, gravity=0.1, max_fall=3):
+        self.tilequery = tilequery
+        self.gravity = gravity
+        self.max_fall = max_fall
+
+        self.pos = np.zeros((capacity, 2))
+        self.velocity = np.zeros((capacity, 2))
+        self.movement = np.zeros((capacity, 2)) # per frame input, like the movement argument of PhysicsEntity.update
+        self.size = np.zeros((capacity, 2), dtype=int)
+        self.collisions = np.zeros((capacity, 4), dtype=bool)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.free = list(range(capacity - 1, -1, -1))
+        self.rebuild()
+
+    def rebuild(self):
+        # offgrid physics tiles aren't in the TileQuery grid, keep them as rows of (x, y, w, h)
+        tilemap = self.tilequery.tilemap
+        rects = []
+        for tile in tilemap.offgrid_tiles:
+            if tile["group"] in tilemap.PHYSICS_TILES:
+                size = tilemap.game.assets[tile["group"]][0][tile["part"]].get_size()
+                rects.append((int(tile["pos"][0]), int(tile["pos"][1]), size[0], size[1]))
+        self.offgrid = np.array(rects, dtype=int).reshape(-1, 4)
+
+    def grow(self):
+        old = len(self.alive)
+        for name in ["pos", "velocity", "movement", "size", "collisions", "alive"]:
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros_like(array)]))
+        self.free.extend(range(old * 2 - 1, old - 1, -1))
+
+    def add(self, pos, size, velocity=(0, 0)):
+        if not self.free:
+            self.grow()
+        body = self.free.pop()
+        self.pos[body] = pos
+        self.size[body] = size
+        self.velocity[body] = velocity
+        self.movement[body] = 0
+        self.collisions[body] = False
+        self.alive[body] = True
+        return body
+
+    def remove(self, body):
+        self.alive[body] = False
+        self.free.append(body)
+
+    def clear(self):
+        self.alive[:] = False
+        self.free = list(range(len(self.alive) - 1, -1, -1))
+
+    def count(self):
+        return int(self.alive.sum())
+
+    def rect(self, body):
+        return (int(self.pos[body, 0]), int(self.pos[body, 1]), int(self.size[body, 0]), int(self.size[body, 1]))
+
+    def resolve(self, bodies, axis, moved):
+        # pushes bodies out of whatever they overlap on one axis, against the direction they moved
+        tile_size = self.tilequery.tile_size
+        rects = np.concatenate([np.trunc(self.pos[bodies]), self.size[bodies]], axis=1)
+        first = np.floor(rects[:, axis] / tile_size).astype(int)
+        last = np.ceil((rects[:, axis] + rects[:, 2 + axis]) / tile_size).astype(int) - 1
+        forward = moved > 0
+
+        # walk the tile lines each body covers, nearest the side it came from first.
+        # the first solid line is the one PhysicsEntity would have ended up against
+        edge = np.where(forward, np.inf, -np.inf)
+        found = np.zeros(len(bodies), dtype=bool)
+        strips = rects.copy()
+        strips[:, 2 + axis] = tile_size
+        for k in range(int((last - first).max(initial=0)) + 1):
+            line = np.where(forward, first + k, last - k)
+            strips[:, axis] = line * tile_size
+            solid = ~found & (line >= first) & (line <= last) & self.tilequery.solid_boxes(strips)
+            edge[solid] = np.where(forward, line * tile_size, (line + 1) * tile_size)[solid]
+            found |= solid
+
+        if len(self.offgrid):
+            tiles = self.offgrid[None, :, :]
+            boxes = rects[:, None, :]
+            overlap = ((tiles[..., 0] < boxes[..., 0] + boxes[..., 2]) & (tiles[..., 0] + tiles[..., 2] > boxes[..., 0]) &
+                       (tiles[..., 1] < boxes[..., 1] + boxes[..., 3]) & (tiles[..., 1] + tiles[..., 3] > boxes[..., 1]))
+            near = np.where(overlap, tiles[..., axis], np.inf).min(axis=1)
+            far = np.where(overlap, tiles[..., axis] + tiles[..., 2 + axis], -np.inf).max(axis=1)
+            edge = np.where(forward, np.minimum(edge, near), np.maximum(edge, far))
+
+        hit = np.isfinite(edge)
+        pushed = hit & (moved != 0)
+        resting = hit & (moved == 0) # overlapping without moving only snaps to the truncated rect
+        self.pos[bodies[pushed], axis] = np.where(forward, edge - rects[:, 2 + axis], edge)[pushed]
+        self.pos[bodies[resting], axis] = rects[resting, axis]
+        self.collisions[bodies[pushed & forward], RIGHT if axis == 0 else DOWN] = True
+        self.collisions[bodies[pushed & ~forward], LEFT if axis == 0 else UP] = True
+
+    def step(self):
+        bodies = np.flatnonzero(self.alive)
+        if not len(bodies):
+            return
+        self.collisions[bodies] = False
+        frame_movement = self.movement[bodies] + self.velocity[bodies]
+
+        for axis in [0, 1]:
+            self.pos[bodies, axis] += frame_movement[:, axis]
+            self.resolve(bodies, axis, frame_movement[:, axis])
+
+        fall = np.minimum(self.max_fall, self.velocity[bodies, 1] + self.gravity)
+        fall[self.collisions[bodies, UP] | self.collisions[bodies, DOWN]] = 0
+        self.velocity[bodies, 1] = fall
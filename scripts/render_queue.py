@@ -0,0 +1,49 @@
+LAYER_BACKGROUND = 0
+LAYER_TILES = 1
+LAYER_ENTITIES = 2
+LAYER_PLAYER = 3
+LAYER_PARTICLES = 4
+LAYER_UI = 5
+
+class QueueLayer: # stands in for a surface in render(surf, offset) calls, blits go to the queue instead
+    def __init__(self, queue, target, layer):
+        self.queue = queue
+        self.target = target
+        self.layer = layer
+
+    def blit(self, source, dest):
+        self.queue.push(self.target, source, dest, self.layer)
+
+    def get_size(self):
+        return self.target.get_size()
+
+    def get_width(self):
+        return self.target.get_width()
+
+    def get_height(self):
+        return self.target.get_height()
+
+class RenderQueue:
+    # collects (surface, position, layer) for the whole frame, then culls against the
+    # target once and submits everything for that target with a single Surface.blits
+    def __init__(self):
+        self.entries = {}
+
+    def push(self, target, surf, pos, layer=0):
+        if target not in self.entries:
+            self.entries[target] = []
+        self.entries[target].append((layer, surf, pos))
+
+    def layer(self, target, layer):
+        return QueueLayer(self, target, layer)
+
+    def flush(self, target):
+        entries = self.entries.pop(target, None)
+        if not entries:
+            return
+        entries.sort(key=lambda entry: entry[0]) # stable, so push order holds within a layer
+        view = target.get_rect()
+        target.blits([(surf, pos) for layer, surf, pos in entries if view.colliderect((pos, surf.get_size()))], doreturn=False)
+
+    def clear(self):
+        self.entries = {}
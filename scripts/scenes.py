@@ -0,0 +1,271 @@
+import time
+
+import pygame
+
+from scripts.text import text
+from scripts.dialogue import DialogueBox
+from scripts.lighting import LIGHTS
+from scripts.render_queue import LAYER_BACKGROUND, LAYER_TILES, LAYER_ENTITIES, LAYER_PLAYER, LAYER_UI
+
+class Scene:
+    def __init__(self, game):
+        self.game = game
+
+    def enter(self):
+        pass
+
+    def exit(self):
+        pass
+
+    def resume(self):
+        # called when the scene above this one is popped
+        pass
+
+    def handle_event(self, event):
+        pass
+
+    def update(self):
+        pass
+
+    def render(self):
+        pass
+
+class SceneStack:
+    # only the top scene updates and renders, overlays freeze whatever is below them
+    def __init__(self):
+        self.scenes = []
+
+    def top(self):
+        return self.scenes[-1]
+
+    def push(self, scene):
+        self.scenes.append(scene)
+        scene.enter()
+
+    def pop(self):
+        scene = self.scenes.pop()
+        scene.exit()
+        if self.scenes:
+            self.top().resume()
+        return scene
+
+FALL_MARGIN = 64 # how far below the level the player can fall before respawning
+
+class WorldScene(Scene):
+    def update(self):
+        game = self.game
+        if game.rewinding:
+            snapshot = game.history.pop()
+            if snapshot:
+                snapshot.restore(game)
+            game.snowfall.update()
+            return
+
+        game.camera.update(game.player.rect())
+
+        for group in [game.snowglobes, game.exits, game.signs]:
+            for entity in group:
+                entity.update()
+
+        game.player.update(game.tilemap)
+        game.physics.step()
+        game.tick += 1
+        game.snowfall.update()
+
+        if game.camera.bounds and game.player.pos[1] > game.camera.bounds.bottom + FALL_MARGIN:
+            game.respawn()
+        game.history.capture(game)
+
+    def render_world(self, target):
+        # draws the world onto the canvas and queues the scaled canvas for target
+        game = self.game
+        queue = game.render_queue
+        render_scroll = game.camera.render_scroll()
+
+        queue.push(game.canvas, game.assets["background"][0], (0, 0), LAYER_BACKGROUND)
+
+        tile_layer = queue.layer(game.canvas, LAYER_TILES)
+        for layer, scroll_layer in game.scroll_layers.items():
+            scroll_layer.update(render_scroll)
+            scroll_layer.render(tile_layer)
+            game.tilemap.render_animated(tile_layer, render_scroll, game.tick, layers=[layer])
+
+        entity_layer = queue.layer(game.canvas, LAYER_ENTITIES)
+        for group in [game.snowglobes, game.exits, game.signs]:
+            for entity in group:
+                if game.camera.is_visible(entity.rect()):
+                    entity.render(entity_layer, render_scroll)
+
+        game.player.render(queue.layer(game.canvas, LAYER_PLAYER), offset=render_scroll)
+
+        # PLAYER HITBOX
+        #pygame.draw.rect(game.canvas, (255, 255, 0), (game.player.pos[0] - render_scroll[0], game.player.pos[1] - render_scroll[1], game.player.size[0], game.player.size[1]))
+
+        queue.flush(game.canvas)
+        game.snowfall.render(game.canvas, game.scroll)
+        game.lighting.add(game.player.rect().center, *LIGHTS["player"])
+        game.lighting.apply(game.canvas, render_scroll)
+        queue.push(target, pygame.transform.scale(game.canvas, target.get_size()), game.camera.shake_offset(), LAYER_BACKGROUND)
+
+    def snapshot(self):
+        # the current world frame as a display sized surface, for overlays to draw on top of
+        surf = pygame.Surface(self.game.display_size)
+        self.render_world(surf)
+        self.game.render_queue.flush(surf)
+        self.game.textQueue.clear()
+        return surf
+
+    def render(self):
+        game = self.game
+        self.render_world(game.display)
+
+        for toShow in game.textQueue:
+            game.render_queue.push(game.display, toShow[0], toShow[1], LAYER_UI)
+        game.textQueue.clear()
+
+        game.render_queue.flush(game.display)
+
+    def resume(self):
+        # key releases went to the overlay, so pick up the keyboard state again
+        keys = pygame.key.get_pressed()
+        self.game.player.movement = [keys[pygame.K_a] or keys[pygame.K_LEFT], keys[pygame.K_d] or keys[pygame.K_RIGHT]]
+        self.game.player.space_bar = False
+        self.game.interacting = False
+        self.game.rewinding = keys[pygame.K_r]
+
+    def handle_event(self, event):
+        game = self.game
+        if event.type == pygame.KEYDOWN:
+            # Movement
+            if event.key in [pygame.K_a, pygame.K_LEFT]:
+                game.player.movement[0] = True
+            if event.key in [pygame.K_d, pygame.K_RIGHT]:
+                game.player.movement[1] = True
+            if event.key in [pygame.K_SPACE]:
+                game.player.space_bar = True
+                game.player.jump()
+
+            # Other
+            if event.key in [pygame.K_e]:
+                game.interacting = True
+            if event.key in [pygame.K_t]:
+                game.transition(text(game.assets["font"][0], desiredText="you have pressed T.", color=(255, 255, 255), scale=5), 2)
+            if event.key in [pygame.K_ESCAPE]:
+                game.scenes.push(PauseScene(game))
+            if event.key in [pygame.K_r]:
+                game.rewinding = True
+            if event.key in [pygame.K_BACKSPACE]:
+                game.respawn()
+
+        if event.type == pygame.KEYUP:
+            # Movement
+            if event.key in [pygame.K_a, pygame.K_LEFT]:
+                game.player.movement[0] = False
+            if event.key in [pygame.K_d, pygame.K_RIGHT]:
+                game.player.movement[1] = False
+            if event.key in [pygame.K_SPACE]:
+                game.player.space_bar = False
+                game.player.vary_jump()
+
+            # Other
+            if event.key in [pygame.K_e]:
+                game.interacting = False
+            if event.key in [pygame.K_r]:
+                game.rewinding = False
+
+class OverlayScene(Scene):
+    # renders the world once on enter, then only blits that snapshot under itself
+    def enter(self):
+        self.snapshot = self.game.world.snapshot()
+
+    def render(self):
+        self.game.display.blit(self.snapshot, (0, 0))
+
+class TransitionScene(OverlayScene):
+    def __init__(self, game, showText, waitTime, next_level=None):
+        super().__init__(game)
+        self.displayTextSurf = showText
+        self.waitTime = waitTime
+        self.next_level = next_level
+
+        ds = game.display.get_size()
+        self.pointAltitude = 250
+        self.y = -ds[1] - self.pointAltitude
+        self.stage = 1
+        self.begin = 0
+
+    def update(self):
+        game = self.game
+        ds = game.display.get_size()
+        now = time.time()
+
+        if self.stage == 1:
+            self.y += ds[1]/10
+            if self.y >= 0:
+                self.stage = 2
+                self.begin = now
+        if self.stage == 2:
+            if now - self.begin > self.waitTime and (not game.loader.pending() or game.loader.ready()):
+                if game.loader.pending():
+                    try:
+                        game.apply_level(game.loader.take())
+                        self.snapshot = game.world.snapshot()
+                    except FileNotFoundError:
+                        print(f"Level {self.next_level} not found.")
+                    except Exception as e: # e.g. a half written map, stay on the current level
+                        print(f"Level {self.next_level} failed to load: " + repr(e))
+                self.stage = 3
+        if self.stage == 3:
+            self.y += ds[1]/10
+            if self.y >= ds[1]:
+                game.scenes.pop()
+
+    def render(self):
+        super().render()
+        ds = self.game.display.get_size()
+        dtss = self.displayTextSurf.get_size()
+        y = self.y
+        pPoints = [(0, y - self.pointAltitude - 50), (ds[0]/2, y - 50),(ds[0], y - self.pointAltitude - 50), (ds[0], ds[1] + y + 50), (ds[0]/2, ds[1] + y + self.pointAltitude + 50), (0, ds[1] + y + 50)]
+        pygame.draw.polygon(self.game.display, (0, 0, 0), pPoints)
+        self.game.display.blit(self.displayTextSurf, (ds[0]/2 - dtss[0]/2, ds[1]/2 + y - dtss[1]/2 - 50))
+
+class DialogueScene(OverlayScene):
+    def __init__(self, game, string):
+        super().__init__(game)
+        self.dialogue = DialogueBox(game.dialogue_font, string, game.display_size[0] - 80)
+
+    def enter(self):
+        super().enter()
+        self.game.player.dialogue = True
+
+    def exit(self):
+        self.game.player.dialogue = False
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key in [pygame.K_e]:
+            if not self.dialogue.advance():
+                self.game.scenes.pop()
+
+    def update(self):
+        self.dialogue.update()
+
+    def render(self):
+        super().render()
+        self.dialogue.render(self.game.display, (40, self.game.display_size[1] - self.dialogue.box.get_height() - 40))
+
+class PauseScene(OverlayScene):
+    def __init__(self, game):
+        super().__init__(game)
+        self.shade = pygame.Surface(game.display_size)
+        self.shade.set_alpha(140)
+        self.label = text(game.assets["font"][0], desiredText="paused", color=(255, 255, 255), scale=5)
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key in [pygame.K_ESCAPE]:
+            self.game.scenes.pop()
+
+    def render(self):
+        super().render()
+        ds = self.game.display_size
+        self.game.display.blit(self.shade, (0, 0))
+        self.game.display.blit(self.label, (ds[0]/2 - self.label.get_width()/2, ds[1]/2 - self.label.get_height()/2))
@@ -0,0 +1,48 @@
+import pygame
+
+LAYER_COLORKEY = (255, 0, 255)
+
+class ScrollLayer:
+    # keeps the static tile layers from the previous frame and only redraws the
+    # strips that the camera exposed since then. draw(surf, offset, area) does the
+    # drawing, normally Tilemap.render_static
+    def __init__(self, draw, size, fill=LAYER_COLORKEY):
+        self.draw = draw
+        self.fill = fill
+        self.surf = pygame.Surface(size)
+        if fill == LAYER_COLORKEY:
+            self.surf.set_colorkey(LAYER_COLORKEY)
+        self.scroll = None
+
+    def invalidate(self):
+        self.scroll = None
+
+    def redraw(self, render_scroll, area=None):
+        self.surf.set_clip(area)
+        self.surf.fill(self.fill, area)
+        self.draw(self.surf, offset=render_scroll, area=area)
+        self.surf.set_clip(None)
+
+    def update(self, render_scroll):
+        w, h = self.surf.get_size()
+        if self.scroll is None:
+            self.redraw(render_scroll)
+        else:
+            dx = render_scroll[0] - self.scroll[0]
+            dy = render_scroll[1] - self.scroll[1]
+            if abs(dx) >= w or abs(dy) >= h:
+                self.redraw(render_scroll)
+            elif dx or dy:
+                self.surf.scroll(-dx, -dy)
+                if dx > 0:
+                    self.redraw(render_scroll, pygame.Rect(w - dx, 0, dx, h))
+                if dx < 0:
+                    self.redraw(render_scroll, pygame.Rect(0, 0, -dx, h))
+                if dy > 0:
+                    self.redraw(render_scroll, pygame.Rect(0, h - dy, w, dy))
+                if dy < 0:
+                    self.redraw(render_scroll, pygame.Rect(0, 0, w, -dy))
+        self.scroll = tuple(render_scroll)
+
+    def render(self, surf, pos=(0, 0)):
+        surf.blit(self.surf, pos)
@@ -0,0 +1,90 @@
+class Snapshot:
+    # the dynamic state of one world tick. slotted so a buffer of them stays small, and
+    # captured into in place so ticking the buffer never allocates a new record
+    __slots__ = ["x", "y", "vx", "vy", "jumps", "air_time", "wall_slide", "slide_counter", "jump_buffer",
+                 "jump_effect", "flip", "action", "frame", "scroll_x", "scroll_y", "tick", "colliding", "frames"]
+
+    def __init__(self):
+        self.action = None
+        # per interact entity: touching the player, animation frame
+        self.colliding = []
+        self.frames = []
+
+    def capture(self, game):
+        player = game.player
+        self.x, self.y = player.pos
+        self.vx, self.vy = player.velocity
+        self.jumps = player.jumps
+        self.air_time = player.air_time
+        self.wall_slide = player.wall_slide
+        self.slide_counter = player.slide_counter
+        self.jump_buffer = player.jump_buffer
+        self.jump_effect = player.jump_effect
+        self.flip = player.flip
+        self.action = player.action
+        self.frame = player.animation.frame
+        self.scroll_x, self.scroll_y = game.camera.scroll
+        self.tick = game.tick
+        # filled in place, the lists only grow or shrink when the entity count changes
+        i = 0
+        for group in (game.exits, game.snowglobes, game.signs):
+            for entity in group:
+                if i == len(self.colliding):
+                    self.colliding.append(False)
+                    self.frames.append(0)
+                self.colliding[i] = entity.colliding
+                self.frames[i] = entity.animation.frame
+                i += 1
+        del self.colliding[i:]
+        del self.frames[i:]
+
+    def restore(self, game):
+        player = game.player
+        player.pos = [self.x, self.y]
+        player.velocity = [self.vx, self.vy]
+        player.jumps = self.jumps
+        player.air_time = self.air_time
+        player.wall_slide = self.wall_slide
+        player.slide_counter = self.slide_counter
+        player.jump_buffer = self.jump_buffer
+        player.jump_effect = self.jump_effect
+        player.flip = self.flip
+        player.set_action(self.action)
+        player.animation.frame = self.frame
+        # game.scroll is the same list, so change it in place
+        game.camera.scroll[0] = self.scroll_x
+        game.camera.scroll[1] = self.scroll_y
+        game.camera.screenshake = 0
+        game.camera.update_view()
+        game.tick = self.tick
+        i = 0
+        for group in (game.exits, game.snowglobes, game.signs):
+            for entity in group:
+                if i < len(self.colliding):
+                    entity.colliding = self.colliding[i]
+                    entity.animation.frame = self.frames[i]
+                i += 1
+
+class SnapshotBuffer:
+    # fixed size ring of snapshots, the oldest one gets overwritten once it's full
+    def __init__(self, size=300):
+        self.slots = [Snapshot() for i in range(size)]
+        self.head = 0 # next slot to write
+        self.count = 0
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+    def capture(self, game):
+        self.slots[self.head].capture(game)
+        self.head = (self.head + 1) % len(self.slots)
+        self.count = min(self.count + 1, len(self.slots))
+
+    def pop(self):
+        # newest snapshot, None once there's nothing left to rewind
+        if not self.count:
+            return None
+        self.head = (self.head - 1) % len(self.slots)
+        self.count -= 1
+        return self.slots[self.head]
@@ -0,0 +1,49 @@
+import math
+
+import numpy as np
+import pygame
+
+SNOW_COLORS = [(110, 120, 155), (175, 185, 215), (235, 240, 255)] # far to near
+
+class Snowfall:
+    # every flake is a row in a few numpy arrays and a single pixel written straight
+    # into the target through a pixel array view, no per flake surfaces or blits
+    def __init__(self, size, count=5000, depths=(0.25, 0.5, 1.0), wind=0.15, gust=0.35, seed=None):
+        rng = np.random.default_rng(seed)
+        self.size = np.array(size, dtype=float)
+        self.wind = wind
+        self.gust = gust
+        self.time = 0
+
+        layer = np.sort(rng.integers(0, len(depths), count)) # far flakes first so near ones are written over them
+        self.layer = layer
+        self.depth = np.array(depths, dtype=float)[layer]
+        self.pos = rng.random((count, 2)) * self.size
+        self.fall = (0.1 + rng.random(count) * 0.25) * (0.4 + self.depth)
+        self.sway = rng.random(count) * 0.3
+        self.phase = rng.random(count) * math.tau
+
+        self.colors = None
+        self.color_format = None
+
+    def update(self, dt=1):
+        self.time += dt
+        wind = self.wind + self.gust * math.sin(self.time * 0.013) * math.sin(self.time * 0.0041)
+        self.pos[:, 0] += (wind + self.sway * np.sin(self.time * 0.05 + self.phase)) * self.depth * dt
+        self.pos[:, 1] += self.fall * dt
+        np.mod(self.pos, self.size, out=self.pos)
+
+    def render(self, surf, scroll=(0, 0)):
+        w, h = surf.get_size()
+        fmt = (surf.get_bitsize(), surf.get_masks())
+        if fmt != self.color_format:
+            self.colors = np.array([surf.map_rgb(color) for color in SNOW_COLORS], dtype=np.uint32)[self.layer]
+            self.color_format = fmt
+
+        # parallax: nearer flakes move with the camera more than far ones
+        x = np.mod(self.pos[:, 0] - scroll[0] * self.depth, w).astype(np.intp)
+        y = np.mod(self.pos[:, 1] - scroll[1] * self.depth, h).astype(np.intp)
+
+        pixels = pygame.surfarray.pixels2d(surf)
+        pixels[x, y] = self.colors
+        del pixels # unlocks surf
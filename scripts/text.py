@@ -1,10 +1,13 @@
 import pygame
 from scripts.utils import load_image, clip, swap_color
 
-def text(font_img, desiredText="placeholder",color=(220,220,250),font_specs=[(255,255,255),(0,0,0),(0,0,255),10],font_order=['A','B','C','D','E','F','G','H','I','J','K','L','M','N','O','P','Q','R','S','T','U','V','W','X','Y','Z',
+FONT_SPECS = [(255,255,255),(0,0,0),(0,0,255),10]
+FONT_ORDER = ['A','B','C','D','E','F','G','H','I','J','K','L','M','N','O','P','Q','R','S','T','U','V','W','X','Y','Z',
     'a','b','c','d','e','f','g','h','i','j','k','l','m','n','o','p','q','r','s','t','u','v','w','x','y','z',
     '1','2','3','4','5','6','7','8','9','0',',','.','!','?','+','-','=','\'',
-    '"','_','~','<','>','*','|','#','$','&','/','\\','%',':',';','(',')','[',']','{','}',' '], scale=1): 
+    '"','_','~','<','>','*','|','#','$','&','/','\\','%',':',';','(',')','[',']','{','}',' ']
+
+def text(font_img, desiredText="placeholder",color=(220,220,250),font_specs=FONT_SPECS,font_order=FONT_ORDER,scale=1): 
     lastX = -1
     chars = []
     for x in range(font_img.get_width()):
@@ -32,7 +35,7 @@ def MLText(font_img, glines=["placeholder","second line placeholder","third line
     fontHeight = font_img.get_height()
     lines = []
     for line in glines:
-        lines.append(text(line,color,font_img))
+        lines.append(text(font_img, desiredText=line, color=color))
     lengths = []
     for line in lines:
         lengths.append(line.get_width())
@@ -41,4 +44,72 @@ def MLText(font_img, glines=["placeholder","second line placeholder","third line
         surf.blit(lines[i],(0,i*spacing+i*fontHeight))
     surf.set_colorkey((0,0,0))
     surf = pygame.transform.scale(surf, (surf.get_size()[0] * scale, surf.get_size()[1] * scale))
-    return surf
\ No newline at end of file
+    return surf
+
+class Font: # glyphs cut, colored and scaled once, then reused for every string
+    def __init__(self, font_img, color=(220,220,250), scale=1, font_specs=FONT_SPECS, font_order=FONT_ORDER):
+        self.height = font_specs[3] * scale
+        self.scale = scale
+        self.glyphs = {}
+        lastX = -1
+        i = 0
+        for x in range(font_img.get_width()):
+            if font_img.get_at((x,0)) == font_specs[2] and i < len(font_order):
+                glyph = swap_color(clip(font_img,lastX+1,0,x-lastX-1,font_specs[3]),font_specs[0],color)
+                glyph.set_colorkey((0,0,0))
+                self.glyphs[font_order[i]] = pygame.transform.scale(glyph, (glyph.get_width() * scale, glyph.get_height() * scale))
+                lastX = x
+                i += 1
+
+    def width(self, string):
+        return sum(self.glyphs[char].get_width() + self.scale for char in string if char in self.glyphs)
+
+class TextLayout: # wraps once, keeps the position of every glyph for later blits
+    def __init__(self, font, string, width, spacing=2):
+        self.font = font
+        self.lines = []
+        for paragraph in string.split("\n"):
+            line = ""
+            for word in paragraph.split(" "):
+                candidate = word if not line else line + " " + word
+                if line and font.width(candidate) > width:
+                    self.lines.append(line)
+                    line = word
+                else:
+                    line = candidate
+            self.lines.append(line)
+
+        self.line_height = font.height + spacing * font.scale
+        self.glyphs = [] # (surface, pos) in reveal order
+        for i, line in enumerate(self.lines):
+            x = 0
+            for char in line:
+                if char in font.glyphs:
+                    self.glyphs.append((font.glyphs[char], (x, i * self.line_height)))
+                    x += font.glyphs[char].get_width() + font.scale
+        self.size = (width, max(1, len(self.lines) * self.line_height))
+
+class Typewriter: # reveals a layout a few glyphs per frame onto a persistent surface
+    def __init__(self, layout, speed=0.5):
+        self.layout = layout
+        self.speed = speed
+        self.surf = pygame.Surface(layout.size)
+        self.surf.set_colorkey((0,0,0))
+        self.progress = 0
+        self.revealed = 0
+
+    def done(self):
+        return self.revealed >= len(self.layout.glyphs)
+
+    def update(self, dt=1):
+        self.progress = min(self.progress + self.speed * dt, len(self.layout.glyphs))
+        self.reveal(int(self.progress))
+
+    def skip(self):
+        self.progress = len(self.layout.glyphs)
+        self.reveal(self.progress)
+
+    def reveal(self, count):
+        if count > self.revealed:
+            self.surf.blits(self.layout.glyphs[self.revealed:count], doreturn=False)
+            self.revealed = count
@@ -14,6 +14,9 @@ AUTOTILE_MAP = {
     tuple(sorted([(-1, 0), (0, -1)])): 8,
 }
 
+TILE_LAYERS = ["background", "offgrid", "tilemap"] # in draw order
+CHUNK_SIZE = 8 # in tiles, animated tiles are bucketed by chunk so only the visible ones get looked at
+
 NEIGHBOR_OFFSETS = []
 for x in range(-2, 3):
     for y in range(-2, 3):
@@ -29,6 +32,9 @@ class Tilemap:
         self.entities = []
         self.PHYSICS_TILES = set()
         self.AUTOTILE_GROUPS = set()
+        self.ANIMATED_TILES = set()
+        self.index = {"tilemap": {}, "background": {}, "offgrid": {}}
+        self.animated = {layer: {} for layer in TILE_LAYERS} # layer: {chunk: [(group, part, world pos)]} for tiles in ANIMATED_TILES
 
         for key in self.game.assets.keys():
             if self.game.assets[key][1].count("physics"):
@@ -36,27 +42,98 @@ class Tilemap:
         for key in self.game.assets.keys():
             if self.game.assets[key][1].count("autotile"):
                 self.AUTOTILE_GROUPS.add(key)
+        for key in self.game.assets.keys():
+            if self.game.assets[key][1].count("animated"):
+                self.ANIMATED_TILES.add(key)
 
     def extract(self, id_pairs, keep=False):
+        # looked up through the index, so the cost depends on the matches, not the map size
         matches = []
-        for tile in self.offgrid_tiles.copy():
-            if (tile["group"], tile["part"]) in id_pairs:
+        removed = set()
+        for pair in id_pairs:
+            for key, tile in list(self.index["offgrid"].get(tuple(pair), {}).items()):
                 matches.append(tile.copy())
                 if not keep:
-                    self.offgrid_tiles.remove(tile)
+                    self.unindex_tile("offgrid", key, tile)
+                    removed.add(key)
+        if removed:
+            self.offgrid_tiles[:] = [tile for tile in self.offgrid_tiles if id(tile) not in removed]
 
-        for loc in self.tilemap.copy():
-            tile = self.tilemap[loc]
-            if (tile["group"], tile["part"]) in id_pairs:
+        for pair in id_pairs:
+            for loc, tile in list(self.index["tilemap"].get(tuple(pair), {}).items()):
                 matches.append(tile.copy())
                 matches[-1]["pos"] = matches[-1]["pos"].copy()
                 matches[-1]["pos"][0] *= self.tile_size
                 matches[-1]["pos"][1] *= self.tile_size
                 if not keep:
+                    self.unindex_tile("tilemap", loc, tile)
                     del self.tilemap[loc]
 
         return matches
 
+    def index_tile(self, layer, key, tile):
+        self.index[layer].setdefault((tile["group"], tile["part"]), {})[key] = tile
+
+    def unindex_tile(self, layer, key, tile):
+        tiles = self.index[layer].get((tile["group"], tile["part"]), {})
+        tiles.pop(key, None)
+        if not tiles:
+            self.index[layer].pop((tile["group"], tile["part"]), None)
+
+    def index_tiles(self):
+        # (group, part): {key: tile} per layer, key is the "x;y" loc for the grid layers and
+        # id(tile) for offgrid. the set/remove methods below keep it up to date, anything that
+        # edits the tile dicts directly has to call this again
+        self.index = {"tilemap": {}, "background": {}, "offgrid": {}}
+        for loc, tile in self.tilemap.items():
+            self.index_tile("tilemap", loc, tile)
+        for loc, tile in self.background_tiles.items():
+            self.index_tile("background", loc, tile)
+        for tile in self.offgrid_tiles:
+            self.index_tile("offgrid", id(tile), tile)
+        self.index_animated()
+
+    def find(self, group, part=None, layers=("background", "offgrid", "tilemap")):
+        # every tile of a group (or of one part of it) in the given layers
+        tiles = []
+        for layer in layers:
+            for (tile_group, tile_part), layer_tiles in self.index[layer].items():
+                if tile_group == group and part in (None, tile_part):
+                    tiles += layer_tiles.values()
+        return tiles
+
+    def set_tile(self, pos, group, part, background=False):
+        layer, tiles = ("background", self.background_tiles) if background else ("tilemap", self.tilemap)
+        loc = str(pos[0]) + ";" + str(pos[1])
+        if loc in tiles:
+            self.remove_tile(pos, background)
+        tiles[loc] = {"group": group, "part": part, "pos": list(pos)}
+        self.index_tile(layer, loc, tiles[loc])
+        if group in self.ANIMATED_TILES:
+            self.index_animated()
+
+    def remove_tile(self, pos, background=False):
+        layer, tiles = ("background", self.background_tiles) if background else ("tilemap", self.tilemap)
+        loc = str(pos[0]) + ";" + str(pos[1])
+        if loc in tiles:
+            tile = tiles.pop(loc)
+            self.unindex_tile(layer, loc, tile)
+            if tile["group"] in self.ANIMATED_TILES:
+                self.index_animated()
+
+    def add_offgrid(self, pos, group, part):
+        tile = {"group": group, "part": part, "pos": list(pos)}
+        self.offgrid_tiles.append(tile)
+        self.index_tile("offgrid", id(tile), tile)
+        if group in self.ANIMATED_TILES:
+            self.index_animated()
+
+    def remove_offgrid(self, tile):
+        self.offgrid_tiles.remove(tile)
+        self.unindex_tile("offgrid", id(tile), tile)
+        if tile["group"] in self.ANIMATED_TILES:
+            self.index_animated()
+
     def save(self, path):
         f = open(path, "w")
         json.dump({"tilemap": self.tilemap, "tile_size": self.tile_size, "offgrid": self.offgrid_tiles, "background": self.background_tiles, "entities": self.entities}, f)
@@ -69,9 +146,48 @@ class Tilemap:
 
         self.tilemap = map_data["tilemap"]
         self.tile_size = map_data["tile_size"]
-        self.offgrid_tiles = map_data["offgrid"]
-        self.background_tiles = map_data["background"]
-        self.entities = map_data["entities"]
+        self.offgrid_tiles = map_data.get("offgrid", [])
+        self.background_tiles = map_data.get("background", {})
+        self.entities = map_data.get("entities", [])
+        self.index_tiles()
+
+    def adopt(self, other):
+        # take over the tile data of a tilemap loaded elsewhere (e.g. in a worker thread)
+        self.tilemap = other.tilemap
+        self.tile_size = other.tile_size
+        self.offgrid_tiles = other.offgrid_tiles
+        self.background_tiles = other.background_tiles
+        self.entities = other.entities
+        self.index = other.index
+        self.animated = other.animated
+
+    def index_animated(self):
+        # kept per layer so they can be drawn between the static layers they belong to
+        self.animated = {layer: {} for layer in TILE_LAYERS}
+        chunk_px = CHUNK_SIZE * self.tile_size
+        for group in self.ANIMATED_TILES:
+            for layer in TILE_LAYERS:
+                for tile in self.find(group, layers=[layer]):
+                    if layer == "offgrid":
+                        pos = (math.floor(tile["pos"][0]), math.floor(tile["pos"][1]))
+                    else:
+                        pos = (tile["pos"][0] * self.tile_size, tile["pos"][1] * self.tile_size)
+                    chunk = (pos[0] // chunk_px, pos[1] // chunk_px)
+                    self.animated[layer].setdefault(chunk, []).append((tile["group"], tile["part"], pos))
+
+    def bounds(self):
+        # world rect covering every tile, None for an empty map
+        rect = None
+        grid = list(self.tilemap.values()) + list(self.background_tiles.values())
+        if grid:
+            xs = [tile["pos"][0] for tile in grid]
+            ys = [tile["pos"][1] for tile in grid]
+            left, top = min(xs), min(ys)
+            rect = pygame.Rect(left * self.tile_size, top * self.tile_size, (max(xs) - left + 1) * self.tile_size, (max(ys) - top + 1) * self.tile_size)
+        for tile in self.offgrid_tiles:
+            tile_rect = pygame.Rect(tile["pos"], self.game.assets[tile["group"]][0][tile["part"]].get_size())
+            rect = rect.union(tile_rect) if rect else tile_rect
+        return rect
 
     def solid_check(self, pos):
         tile_loc = str(int(pos[0] // self.tile_size)) + ";" + str(int(pos[1] // self.tile_size))
@@ -109,6 +225,7 @@ class Tilemap:
 
     def autotile(self, tilemap=None):
         tiles = tilemap if tilemap else self.tilemap
+        layer = {id(self.tilemap): "tilemap", id(self.background_tiles): "background"}.get(id(tiles))
         for loc in tiles:
             tile = tiles[loc]
             neighbors = set()
@@ -118,40 +235,68 @@ class Tilemap:
                     if tiles[check_loc]["group"] == tile["group"]:
                         neighbors.add(shift)
             neighbors = tuple(sorted(neighbors))
-            if (tile["group"] in self.AUTOTILE_GROUPS) and (neighbors in AUTOTILE_MAP):
+            if (tile["group"] in self.AUTOTILE_GROUPS) and (neighbors in AUTOTILE_MAP) and tile["part"] != AUTOTILE_MAP[neighbors]:
+                if layer:
+                    self.unindex_tile(layer, loc, tile)
                 tile["part"] = AUTOTILE_MAP[neighbors]
+                if layer:
+                    self.index_tile(layer, loc, tile)
+
+    def render_static(self, surf, offset=(0,0), area=None, layers=TILE_LAYERS):
+        # everything but the animated tiles, for caches that are only redrawn when scrolled
+        self.render(surf, offset=offset, area=area, animated=False, layers=layers)
+
+    def render_animated(self, surf, offset, tick, layers=TILE_LAYERS):
+        # the animated tiles only, drawn every frame on top of the static tiles of the same layer
+        chunk_px = CHUNK_SIZE * self.tile_size
+        w, h = surf.get_size()
+        view = pygame.Rect(offset, (w, h))
+        # one extra chunk up and left for offgrid tiles hanging over a chunk edge
+        for cx in range(offset[0] // chunk_px - 1, (offset[0] + w) // chunk_px + 1):
+            for cy in range(offset[1] // chunk_px - 1, (offset[1] + h) // chunk_px + 1):
+                for layer in layers:
+                    for group, part, pos in self.animated[layer].get((cx, cy), []):
+                        img = self.game.assets[group][0].img(part, tick)
+                        if view.colliderect((pos, img.get_size())):
+                            surf.blit(img, (pos[0] - offset[0], pos[1] - offset[1]))
+
+    def render(self, surf, offset=(0,0), alpha=255, area=None, animated=True, layers=TILE_LAYERS):
+        # area limits drawing to part of surf (in surf coordinates), the whole surface by default.
+        # animated=False leaves out the tiles in ANIMATED_TILES, layers picks which of TILE_LAYERS to draw
+        area = area or surf.get_rect()
+        skip = () if animated else self.ANIMATED_TILES
+        x_range = range((offset[0] + area.left) // self.tile_size, (offset[0] + area.right) // self.tile_size + 1)
+        y_range = range((offset[1] + area.top) // self.tile_size, (offset[1] + area.bottom) // self.tile_size + 1)
+        blits = []
 
-    def render(self, surf, offset=(0,0), alpha=255):
-        for x in range(offset[0] // self.tile_size, (offset[0] + surf.get_width()) // self.tile_size + 1):
-            for y in range(offset[1] // self.tile_size, (offset[1] + surf.get_height()) // self.tile_size + 1):
+        for x in x_range if "background" in layers else ():
+            for y in y_range:
                 loc = str(x) + ";" + str(y)
-                if loc in self.background_tiles:
+                if loc in self.background_tiles and self.background_tiles[loc]["group"] not in skip:
                     tile = self.background_tiles[loc]
                     img = self.game.assets[tile["group"]][0][tile["part"]]
-                    render_pos = (tile["pos"][0] * self.tile_size - offset[0], tile["pos"][1] * self.tile_size - offset[1])
-                    if self.game.type == "editor":
-                        surf.blit(img, render_pos)
-                    elif -self.tile_size <= render_pos[0] <= self.game.canvas_size[0] and -self.tile_size <= render_pos[1] <= self.game.canvas_size[1]:
-                        surf.blit(img, render_pos)
+                    blits.append((img, (tile["pos"][0] * self.tile_size - offset[0], tile["pos"][1] * self.tile_size - offset[1])))
 
-        for tile in self.offgrid_tiles:
-            img = self.game.assets[tile["group"]][0][tile["part"]].copy()
-            img.set_alpha(alpha)
-            render_pos = (tile["pos"][0] - offset[0], tile["pos"][1] - offset[1])
-            if self.game.type == "editor":
-                        surf.blit(img, render_pos)
-            elif -self.tile_size <= render_pos[0] <= self.game.canvas_size[0] and -self.tile_size <= render_pos[1] <= self.game.canvas_size[1]:
-                surf.blit(img, render_pos)
-
-        for x in range(offset[0] // self.tile_size, (offset[0] + surf.get_width()) // self.tile_size + 1):
-            for y in range(offset[1] // self.tile_size, (offset[1] + surf.get_height()) // self.tile_size + 1):
+        for tile in self.offgrid_tiles if "offgrid" in layers else ():
+            if tile["group"] in skip:
+                continue
+            img = self.game.assets[tile["group"]][0][tile["part"]]
+            render_pos = (math.floor(tile["pos"][0] - offset[0]), math.floor(tile["pos"][1] - offset[1]))
+            if area.colliderect((render_pos, img.get_size())):
+                if alpha != 255:
+                    img = img.copy()
+                    img.set_alpha(alpha)
+                blits.append((img, render_pos))
+
+        for x in x_range if "tilemap" in layers else ():
+            for y in y_range:
                 loc = str(x) + ";" + str(y)
-                if loc in self.tilemap:
+                if loc in self.tilemap and self.tilemap[loc]["group"] not in skip:
                     tile = self.tilemap[loc]
-                    img = self.game.assets[tile["group"]][0][tile["part"]].copy()
-                    img.set_alpha(alpha)
-                    render_pos = (tile["pos"][0] * self.tile_size - offset[0], tile["pos"][1] * self.tile_size - offset[1])
-                    if self.game.type == "editor":
-                        surf.blit(img, render_pos)
-                    elif -self.tile_size <= render_pos[0] <= self.game.canvas_size[0] and -self.tile_size <= render_pos[1] <= self.game.canvas_size[1]:
-                        surf.blit(img, render_pos)
+                    img = self.game.assets[tile["group"]][0][tile["part"]]
+                    if alpha != 255:
+                        img = img.copy()
+                        img.set_alpha(alpha)
+                    blits.append((img, (tile["pos"][0] * self.tile_size - offset[0], tile["pos"][1] * self.tile_size - offset[1])))
+
+        surf.blits(blits, doreturn=False)
@@ -0,0 +1,117 @@
+import numpy as np
+
+AXES = np.array([(1, 0), (-1, 0), (0, 1), (0, -1)], dtype=float)
+
+class TileQuery:
+    # batched spatial queries against the physics tiles of a Tilemap. positions are
+    # world pixels, everything takes and returns numpy arrays so hundreds of
+    # queries cost a handful of vector ops. call rebuild() after the tilemap changes
+    def __init__(self, tilemap):
+        self.tilemap = tilemap
+        self.rebuild()
+
+    def rebuild(self):
+        self.tile_size = self.tilemap.tile_size
+        locs = [tile["pos"] for tile in self.tilemap.tilemap.values() if tile["group"] in self.tilemap.PHYSICS_TILES]
+        if locs:
+            locs = np.array(locs, dtype=int)
+            self.origin = locs.min(axis=0)
+            self.grid = np.zeros(locs.max(axis=0) - self.origin + 1, dtype=bool)
+            self.grid[locs[:, 0] - self.origin[0], locs[:, 1] - self.origin[1]] = True
+        else:
+            self.origin = np.zeros(2, dtype=int)
+            self.grid = np.zeros((1, 1), dtype=bool)
+
+        # summed area table, makes any box test four lookups
+        self.sat = np.zeros((self.grid.shape[0] + 1, self.grid.shape[1] + 1), dtype=np.int32)
+        self.sat[1:, 1:] = self.grid.cumsum(axis=0).cumsum(axis=1)
+
+    def adopt(self, other):
+        # take over a grid built elsewhere (e.g. by the level loader thread) for the same tiles
+        self.tile_size = other.tile_size
+        self.origin = other.origin
+        self.grid = other.grid
+        self.sat = other.sat
+
+    def solid_cells(self, cx, cy):
+        # grid coordinates in, bool per cell out. anything outside the map is empty
+        gx = np.asarray(cx) - self.origin[0]
+        gy = np.asarray(cy) - self.origin[1]
+        inside = (gx >= 0) & (gx < self.grid.shape[0]) & (gy >= 0) & (gy < self.grid.shape[1])
+        solid = np.zeros(gx.shape, dtype=bool)
+        solid[inside] = self.grid[gx[inside], gy[inside]]
+        return solid
+
+    def solid_points(self, points):
+        cells = np.floor(np.asarray(points, dtype=float).reshape(-1, 2) / self.tile_size).astype(int)
+        return self.solid_cells(cells[:, 0], cells[:, 1])
+
+    def solid_boxes(self, rects):
+        # rects as rows of (x, y, w, h), True where the box overlaps any solid tile
+        rects = np.asarray(rects, dtype=float).reshape(-1, 4)
+        x0 = np.floor(rects[:, 0] / self.tile_size).astype(int) - self.origin[0]
+        y0 = np.floor(rects[:, 1] / self.tile_size).astype(int) - self.origin[1]
+        x1 = np.ceil((rects[:, 0] + rects[:, 2]) / self.tile_size).astype(int) - self.origin[0]
+        y1 = np.ceil((rects[:, 1] + rects[:, 3]) / self.tile_size).astype(int) - self.origin[1]
+        x0, x1 = np.clip(x0, 0, self.grid.shape[0]), np.clip(x1, 0, self.grid.shape[0])
+        y0, y1 = np.clip(y0, 0, self.grid.shape[1]), np.clip(y1, 0, self.grid.shape[1])
+        count = self.sat[x1, y1] - self.sat[x0, y1] - self.sat[x1, y0] + self.sat[x0, y0]
+        return count > 0
+
+    def raycast(self, origins, directions, max_dist):
+        # grid DDA stepped for all rays at once. returns (hit, dist, points, normals),
+        # rays that start inside a solid tile hit at distance 0 with a zero normal
+        origins = np.asarray(origins, dtype=float).reshape(-1, 2) / self.tile_size
+        directions = np.asarray(directions, dtype=float).reshape(-1, 2)
+        directions = directions / np.maximum(np.linalg.norm(directions, axis=1, keepdims=True), 1e-12)
+        directions = np.broadcast_to(directions, origins.shape)
+        max_t = max_dist / self.tile_size
+        count = len(origins)
+
+        cell = np.floor(origins).astype(int)
+        step = np.sign(directions).astype(int)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_delta = np.where(step != 0, np.abs(1 / directions), np.inf)
+            t_max = np.where(step > 0, (cell + 1 - origins) / directions, np.where(step < 0, (cell - origins) / directions, np.inf))
+
+        hit = self.solid_cells(cell[:, 0], cell[:, 1])
+        dist = np.where(hit, 0.0, max_t)
+        normals = np.zeros((count, 2))
+        active = np.flatnonzero(~hit)
+
+        for _ in range(int(np.ceil(max_t * 2)) + 2):
+            if not len(active):
+                break
+            axis = (t_max[active, 1] < t_max[active, 0]).astype(int)
+            t_now = t_max[active, axis]
+            in_range = t_now <= max_t
+            active, axis, t_now = active[in_range], axis[in_range], t_now[in_range]
+
+            cell[active, axis] += step[active, axis]
+            t_max[active, axis] += t_delta[active, axis]
+
+            solid = self.solid_cells(cell[active, 0], cell[active, 1])
+            done = active[solid]
+            hit[done] = True
+            dist[done] = t_now[solid]
+            normals[done, axis[solid]] = -step[done, axis[solid]]
+            active = active[~solid]
+
+        points = (origins + directions * dist[:, None]) * self.tile_size
+        return hit, dist * self.tile_size, points, normals
+
+    def probe(self, points, direction, max_dist):
+        # distance from each point to the nearest solid surface along one direction,
+        # e.g. direction (0, 1) for ground probes. inf where nothing is within max_dist
+        hit, dist, _, _ = self.raycast(points, direction, max_dist)
+        return np.where(hit, dist, np.inf)
+
+    def nearest_surface(self, points, max_dist):
+        # closest solid surface along the four axes, returns (dist, normal) per point.
+        # like raycast, points inside a solid tile get distance 0 and a zero normal
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        dists = np.stack([self.probe(points, axis, max_dist) for axis in AXES], axis=1)
+        best = dists.argmin(axis=1)
+        dist = dists[np.arange(len(points)), best]
+        normals = np.where((np.isfinite(dist) & (dist > 0))[:, None], -AXES[best], 0)
+        return dist, normals
@@ -31,9 +31,14 @@ def swap_color(img,old_c,new_c):
     surf.blit(img,(0,0))
     return surf
 
+def build_masks(images):
+    # (mask, flipped mask) per frame, built once at load so overlap tests never read pixels
+    return [(pygame.mask.from_surface(img), pygame.mask.from_surface(pygame.transform.flip(img, True, False))) for img in images]
+
 class Animation:
-    def __init__(self, images, img_dur=5, anim_offset=[0, 0], size_tweak = [0, 0], loop=True):
+    def __init__(self, images, img_dur=5, anim_offset=[0, 0], size_tweak = [0, 0], loop=True, masks=None):
         self.images = images
+        self.masks = masks if masks is not None else build_masks(images)
         self.img_duration = img_dur
         self.loop = loop
         self.done = False
@@ -42,7 +47,7 @@ class Animation:
         self.size_tweak = size_tweak
 
     def copy(self):
-        return Animation(self.images, self.img_duration, self.anim_offset, self.size_tweak, self.loop)
+        return Animation(self.images, self.img_duration, self.anim_offset, self.size_tweak, self.loop, self.masks)
 
     def update(self, dt=1):
         if self.loop:
@@ -57,6 +62,24 @@ class Animation:
         cf = int(cf % (len(self.images)))
         return self.images[cf]
 
+    def mask(self, flip=False):
+        cf = self.frame / self.img_duration
+        cf = int(cf % (len(self.masks)))
+        return self.masks[cf][flip]
+
+class TileAnimation(list):
+    # an animated tile group. indexes like a plain tile group (first frame of every part) so
+    # the editor and everything else keep working, the frame to draw comes from a global tick
+    # so no tile has any state of its own
+    def __init__(self, frames, img_dur=8):
+        super().__init__(part[0] for part in frames)
+        self.frames = frames
+        self.img_duration = img_dur
+
+    def img(self, part, tick):
+        frames = self.frames[part]
+        return frames[int(tick // self.img_duration) % len(frames)]
+
 def load_spritesheet(spritesheet, colorkey=(0, 0, 0), two_d=False):
     rows = []
     sprites = []
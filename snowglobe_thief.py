@@ -1,16 +1,29 @@
 import sys
-import random
 import time
+from functools import partial
 
 import pygame
 
-from scripts.text import text
-from scripts.utils import load_image, load_images, Animation, load_spritesheet
+from scripts.text import Font
+from scripts.assets import AssetLoader
 from scripts.entities import Player, Door, Snowglobe, Sign
-from scripts.tilemap import Tilemap
+from scripts.tilemap import Tilemap, TILE_LAYERS
+from scripts.level_loader import LevelLoader
+from scripts.scroll_layer import ScrollLayer
+from scripts.tilequery import TileQuery
+from scripts.physics import PhysicsWorld
+from scripts.camera import Camera
+from scripts.snow import Snowfall
+from scripts.lighting import Lighting, LIGHTS
+from scripts.snapshot import Snapshot, SnapshotBuffer
+from scripts.render_queue import RenderQueue
+from scripts.scenes import SceneStack, WorldScene, TransitionScene, DialogueScene
+from scripts.memstats import AllocationCounter, report
+from scripts.hotreload import HotReloader
 
 class Game:
     def __init__(self):
+        start = time.perf_counter()
         pygame.init()
 
         pygame.display.set_caption("Snowglobe Thief")
@@ -25,38 +38,11 @@ class Game:
         self.fps = 60
         self.clock = pygame.time.Clock()
         self.last_time = time.time()
+        self.render_queue = RenderQueue()
 
-        self.assets = {
-            "snow": (load_spritesheet(load_image("tiles/fg/snow.png")), ["tile", "autotile", "physics"]),
-            "stone": (load_spritesheet(load_image("tiles/fg/stone.png")), ["tile", "autotile", "physics"]),
-            "cobblestone": (load_spritesheet(load_image("tiles/fg/cobblestone.png")), ["tile", "autotile", "physics"]),
-            "brick": (load_spritesheet(load_image("tiles/fg/brick.png")), ["tile", "autotile", "physics"]),
-            
-            "barrier": ([pygame.Surface((8, 8))],["tile", "physics"]),
-
-            "snow_bg": (load_spritesheet(load_image("tiles/bg/snow_bg.png")), ["tile", "autotile"]),
-
-            "resize": (load_images("tiles/resize"), ["tile", "physics"]),
-            "decor": (load_images("tiles/decor"), ["tile"]),
-
-            "spawners": (load_images("tiles/spawners"), ["tile", "entity"]),
-
-            "player@idle": (Animation(load_images("entities/player/idle"), img_dur=6, anim_offset=[-1, -2], size_tweak=[-2, -2]), ["animation"]),
-            "player@run": (Animation(load_images("entities/player/run"), img_dur=4, anim_offset=[-1, -2], size_tweak=[-2, -2]), ["animation"]),
-            "player@rising": (Animation(load_images("entities/player/rising"), img_dur=6, anim_offset=[-1, -2], size_tweak=[-2, -2]), ["animation"]),
-            "player@falling": (Animation(load_images("entities/player/falling"), img_dur=6, anim_offset=[-1, -2], size_tweak=[-2, -2]), ["animation"]),
-            "player@wall_slide": (Animation(load_images("entities/player/wall_cling"), img_dur=15, anim_offset=[0, -2], size_tweak=[0, -1]), ["animation"]),
-
-            "door@idle": (Animation(load_images("entities/door/idle")), ["animation"]),
-            "snowglobe@idle": (Animation(load_images("entities/snow_globe/idle")), ["animation"]),
-            "sign@idle": (Animation(load_images("entities/sign/idle")), ["animation"]),
-
-            "particle.warning": (load_image("particle/warning.png"), ["particle"]),
-
-            "background": (load_image("background.png"), ["background"]),
-
-            "font": (load_image("pixel_font.png"), ["font"])
-        }
+        self.last_loading_draw = 0
+        self.asset_loader = AssetLoader(progress=self.draw_loading)
+        self.assets = self.asset_loader.load()
 
         self.player = Player(self, (0,0), [6,14])
         self.particles = []
@@ -64,9 +50,22 @@ class Game:
         self.snowglobes = []
         self.signs = []
         
-        self.cam_speed = 13 # LOWER = FASTER
+        self.camera = Camera(self.canvas_size, speed=13, deadzone=(4, 8))
 
         self.tilemap = Tilemap(self, tile_size=16)
+        self.loader = LevelLoader(self)
+        # one cache per tile layer so animated tiles can be drawn between them
+        self.scroll_layers = {layer: ScrollLayer(partial(self.tilemap.render_static, layers=[layer]), self.canvas_size) for layer in TILE_LAYERS}
+        self.tilequery = TileQuery(self.tilemap)
+        self.physics = PhysicsWorld(self.tilequery)
+
+        self.scroll = self.camera.scroll
+        self.snowfall = Snowfall(self.canvas_size, count=1500)
+        self.lighting = Lighting(self.canvas_size)
+        self.tick = 0 # world frames, drives animated tiles
+        self.history = SnapshotBuffer(self.fps * 5) # hold R to rewind through the last 5 seconds
+        self.checkpoint = None # where backspace and falling out of the level put the player back, set on the first level load
+        self.rewinding = False
 
         self.level = 0
         try:
@@ -74,28 +73,73 @@ class Game:
         except FileNotFoundError:
             print(f"Level {self.level} not found.")
 
-        self.screenshake = 0
-
-        self.scroll = [0, 0]
-        self.scroll[0] += (self.player.rect().centerx - self.canvas.get_width()/2 - self.scroll[0])
-        self.scroll[1] += (self.player.rect().centery - self.canvas.get_height()/2 - self.scroll[1])
-
         self.cur_fps = 0
         self.frame_counter = 0
         self.textQueue = []
         self.fadeTextQueue = []
         self.interacting = False
+        self.dialogue_font = Font(self.assets["font"][0], color=(255, 255, 255), scale=4)
         #self.testSpawner = ParticleSpawner((0,0), 3, color=(255,255,255), speed=[0.5,0.7], lifespan=15)
 
-    def load_level(self, map_id):
-        self.player.air_time = 0
-        self.player.jumps = 1
-        self.player.wall_cling = 0
+        # python snowglobe_thief.py --memstats, then F3 writes memstats.txt
+        self.allocations = None
+        if "--memstats" in sys.argv:
+            self.allocations = AllocationCounter()
+            self.allocations.install()
+
+        # python snowglobe_thief.py --hot-reload picks up edited art and maps while running
+        self.hot_reload = HotReloader(self) if "--hot-reload" in sys.argv else None
+
+        self.world = WorldScene(self)
+        self.scenes = SceneStack()
+        self.scenes.push(self.world)
+
+        self.startup_time = time.perf_counter() - start
+        if "--timings" in sys.argv:
+            print(self.asset_loader.report())
+            print("startup: " + str(round(self.startup_time * 1000, 1)) + " ms")
+
+    def draw_loading(self, done, total):
+        # progress bar while the assets load, throttled so drawing doesn't slow the load down
+        now = time.perf_counter()
+        if now - self.last_loading_draw < 0.05:
+            return
+        self.last_loading_draw = now
+        pygame.event.pump()
+
+        ds = self.display_size
+        self.display.fill((0, 0, 0))
+        pygame.draw.rect(self.display, (255, 255, 255), (100, ds[1]/2 - 10, ds[0] - 200, 20), 2)
+        pygame.draw.rect(self.display, (255, 255, 255), (100, ds[1]/2 - 10, (ds[0] - 200) * done / total, 20))
+        pygame.display.update()
 
-        self.tilemap.load("data/maps/" + str(map_id) + ".json")
+    def load_level(self, map_id):
+        self.loader.request(map_id)
+        self.apply_level(self.loader.wait())
+
+    def apply_level(self, level, keep_player=False):
+        # main-thread half of a level load, the parsing already happened in self.loader.
+        # keep_player leaves the player and camera alone, for hot reloads of the current map
+        self.level = level.map_id
+        if not keep_player:
+            self.player.air_time = 0
+            self.player.jumps = 1
+            self.player.wall_cling = 0
+            self.player.velocity = [0, 0]
+
+        self.tilemap.adopt(level.tilemap)
+        for scroll_layer in self.scroll_layers.values():
+            scroll_layer.invalidate()
+        self.tilequery.adopt(level.tilequery)
+        self.physics.rebuild()
+        if not keep_player:
+            self.physics.clear()
 
-        for spawner in self.tilemap.extract([("spawners", 0), ("spawners", 1), ("spawners", 2)]):
-            if spawner["part"] == 0:
+        self.exits = []
+        self.snowglobes = []
+        self.signs = []
+        for spawner in level.spawners:
+            if spawner["part"] == 0 and not keep_player:
                 self.player.pos = spawner["pos"]
             if spawner["part"] == 1:
                 self.exits.append(Door(self, spawner["pos"], [9, 19]))
@@ -103,137 +147,70 @@ class Game:
                 self.snowglobes.append(Snowglobe(self, spawner["pos"], [8, 10]))
             if spawner["part"] == 3:
                 self.signs.append(Sign(self, spawner["pos"], [10, 10]))
+        self.lighting.set_static([(entity.rect().center,) + LIGHTS[entity.asset_id] for entity in self.exits + self.snowglobes])
 
         self.particles = []
-        
-    def transition(self, showText, waitTime):
-        displayTextSurf = showText
-        ds = self.display.get_size()
-        dtss = displayTextSurf.get_size()
-        
-        transitionSurf = pygame.Surface(self.display.get_size())
-        transitionSurf.fill((1, 1, 1))
-        pointAltitude = 250
-        y = -ds[1] - pointAltitude
-        stage = 1
-        self.player.movement = [0, 0]
-        
+
+        self.camera.set_bounds(level.bounds)
+        if not keep_player:
+            self.camera.snap(self.player.rect())
+            self.history.clear()
+            if self.checkpoint is None:
+                self.checkpoint = Snapshot()
+            self.checkpoint.capture(self)
+
+    def respawn(self):
+        # back to the checkpoint straight from memory, the map isn't touched
+        if self.checkpoint is None: # no level loaded yet
+            return
+        self.checkpoint.restore(self)
+        self.history.clear()
+
+    def assets_changed(self, keys):
+        # called after assets were swapped out under the running game
+        for scroll_layer in self.scroll_layers.values():
+            scroll_layer.invalidate()
+        if "font" in keys:
+            self.dialogue_font = Font(self.assets["font"][0], color=(255, 255, 255), scale=4)
+
+    def open_dialogue(self, string):
+        self.scenes.push(DialogueScene(self, string))
+
+    def transition(self, showText, waitTime, next_level=None):
+        # next_level starts loading in the background right away and is swapped in while the screen is covered
+        if next_level is not None:
+            self.loader.request(next_level)
+        self.player.movement = [False, False]
+        self.scenes.push(TransitionScene(self, showText, waitTime, next_level))
+
+    def dump_memstats(self, path="memstats.txt"):
+        stats = report(self.assets, self.allocations)
+        with open(path, "w") as f:
+            f.write(stats + "\n")
+        print(stats)
+
+    def run(self):
         while True:
-            self.canvas.blit(self.assets["background"][0], (0, 0))
-            self.screenshake = max(0, self.screenshake - 1)
-
-            self.scroll[0] += (self.player.rect().centerx - self.canvas.get_width()/2 - self.scroll[0]) / self.cam_speed 
-            self.scroll[1] += (self.player.rect().centery - self.canvas.get_height()/2 - self.scroll[1]) / self.cam_speed
-            render_scroll = (int(self.scroll[0]), int(self.scroll[1]))
-
-            self.tilemap.render(self.canvas, offset=render_scroll)
-
-            for group in [self.snowglobes, self.exits, self.signs]:
-                for entity in group:
-                    entity.update()
-                    entity.render(self.canvas, render_scroll)
-
-            self.player.update(self.tilemap)
-            self.player.render(self.canvas, offset=render_scroll)
-            
-            now = time.time()
-            
-            if stage == 1:
-                y += ds[1]/10
-                if y >= 0:
-                    stage = 2
-                    begin = time.time()
-            if stage == 2:
-                if now - begin > waitTime:
-                    stage = 3
-            if stage == 3:
-                y += ds[1]/10
-                if y >= ds[1]:
-                    self.textQueue.clear()
-                    return
-                
-            self.display.blit(pygame.transform.scale(self.canvas, self.display.get_size()), (0, 0))
-            pPoints = [(0, y - pointAltitude - 50), (ds[0]/2, y - 50),(ds[0], y - pointAltitude - 50), (ds[0], ds[1] + y + 50), (ds[0]/2, ds[1] + y + pointAltitude + 50), (0, ds[1] + y + 50)]
-            pygame.draw.polygon(self.display, (0, 0, 0), pPoints)
-            self.display.blit(displayTextSurf, (ds[0]/2 - dtss[0]/2, ds[1]/2 + y - dtss[1]/2 - 50))
-            
+            scene = self.scenes.top()
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     sys.exit()
-            
-            pygame.display.update()
-            self.clock.tick(self.fps)
-            
-    def run(self):
-        while True:
-            self.canvas.blit(self.assets["background"][0], (0, 0))
-            self.screenshake = max(0, self.screenshake - 1)
-
-            self.scroll[0] += (self.player.rect().centerx - self.canvas.get_width()/2 - self.scroll[0]) / self.cam_speed 
-            self.scroll[1] += (self.player.rect().centery - self.canvas.get_height()/2 - self.scroll[1]) / self.cam_speed
-            render_scroll = (int(self.scroll[0]), int(self.scroll[1]))
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    self.dump_memstats()
+                scene.handle_event(event)
 
-            self.tilemap.render(self.canvas, offset=render_scroll)
+            if self.hot_reload:
+                self.hot_reload.update()
 
-            for group in [self.snowglobes, self.exits, self.signs]:
-                for entity in group:
-                    entity.update()
-                    entity.render(self.canvas, render_scroll)
+            self.scenes.top().update()
+            self.scenes.top().render()
 
-            self.player.update(self.tilemap)
-            self.player.render(self.canvas, offset=render_scroll)
-
-            # PLAYER HITBOX
-            #pygame.draw.rect(self.canvas, (255, 255, 0), (self.player.pos[0] - render_scroll[0], self.player.pos[1] - render_scroll[1], self.player.size[0], self.player.size[1]))
-
-            #print(pygame.Rect.colliderect(self.player.rect(), self.exits[0].rect()))
-
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                if event.type == pygame.KEYDOWN:
-                    # Movement
-                    if event.key in [pygame.K_a, pygame.K_LEFT]:
-                        self.player.movement[0] = True
-                    if event.key in [pygame.K_d, pygame.K_RIGHT]:
-                        self.player.movement[1] = True
-                    if event.key in [pygame.K_SPACE]:
-                        self.player.space_bar = True
-                        self.player.jump()
-
-                    # Other
-                    if event.key in [pygame.K_e]:
-                        self.interacting = True
-                    if event.key in [pygame.K_t]:
-                        self.transition(text(self.assets["font"][0], desiredText="you have pressed T.", color=(255, 255, 255), scale=5), 2)
-                    
-                if event.type == pygame.KEYUP:
-                    # Movement
-                    if event.key in [pygame.K_a, pygame.K_LEFT]:
-                        self.player.movement[0] = False
-                    if event.key in [pygame.K_d, pygame.K_RIGHT]:
-                        self.player.movement[1] = False
-                    if event.key in [pygame.K_SPACE]:
-                        self.player.space_bar = False
-                        self.player.vary_jump()
-
-                    # Other
-                    if event.key in [pygame.K_e]:
-                        self.interacting = False
-
-            screenshake_offset = (random.random() * self.screenshake - self.screenshake / 2, random.random() * self.screenshake - self.screenshake / 2)
-            self.display.blit(pygame.transform.scale(self.canvas,self.display.get_size()), screenshake_offset)
-            
-            for toShow in self.textQueue:
-                self.display.blit(toShow[0], toShow[1])
-            self.textQueue.clear()
-            
             pygame.display.update()
             self.clock.tick(self.fps)
 
+            if self.allocations:
+                self.allocations.frame()
+
 if __name__ == "__main__":
     Game().run()
-else:
-    game_assets = Game().assets
\ No newline at end of file